@@ -0,0 +1,58 @@
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from src.batch import ResultWriter, init_worker, list_images, solve_image
+from src.detector import BACKENDS
+
+def main():
+    parser = argparse.ArgumentParser(description="Solve a directory of screenshots on all cores, without the GUI")
+    parser.add_argument("source", help="Directory of screenshots (optional <image>.json labels next to them)")
+    parser.add_argument("--output", default="batch_results.csv", help=".csv or .jsonl results file")
+    parser.add_argument("--model", default=os.path.join("models", "best.pt"), help="YOLO model path")
+    parser.add_argument("--backend", choices=BACKENDS, default="ultralytics")
+    parser.add_argument("--imgsz", type=int, default=640, help="Letterbox size for onnx/openvino")
+    parser.add_argument("--ground-truth", action="store_true",
+                        help="Use ROIs from the sidecar labels instead of running the detector")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Worker processes")
+    parser.add_argument("--threads", type=int, default=1, help="Detector CPU threads per worker")
+    args = parser.parse_args()
+
+    images = list_images(args.source)
+    if not images:
+        print(f"No images found in {args.source}")
+        return
+    workers = max(1, min(args.workers or 1, len(images)))
+    print(f"Solving {len(images)} images with {workers} workers")
+
+    writer = ResultWriter(args.output)
+    answered = correct = labelled = errors = 0
+    start = time.perf_counter()
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                                 initargs=(args.backend, args.model, args.imgsz,
+                                           args.threads, args.ground_truth)) as pool:
+            # Small chunks keep every worker busy without much IPC per image
+            chunksize = max(1, min(16, len(images) // (workers * 4)))
+            for result in pool.map(solve_image, images, chunksize=chunksize):
+                writer.write(result)
+                if result['error']:
+                    errors += 1
+                    print(f"{result['image']}: {result['error']}")
+                if result['answer'] is not None:
+                    answered += 1
+                if result['expected'] is not None:
+                    labelled += 1
+                    correct += result['answer'] == result['expected']
+    finally:
+        writer.close()
+
+    elapsed = time.perf_counter() - start
+    print(f"Images: {len(images)}, answered: {answered}, errors: {errors}, "
+          f"{elapsed:.1f}s ({len(images) / elapsed:.1f} images/sec)")
+    if labelled:
+        print(f"Accuracy: {correct}/{labelled} ({correct / labelled * 100:.1f}%)")
+    print(f"Results written to {args.output}")
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
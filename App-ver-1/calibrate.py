@@ -0,0 +1,26 @@
+import argparse
+import os
+from src.detector import create_detector, layout_path
+from src.layout import save_layout
+from src.screen_capture import ScreenCapture
+
+def main():
+    parser = argparse.ArgumentParser(description="Detect the ROIs once and save them as a calibrated layout")
+    parser.add_argument("--model", default=os.path.join("models", "best.pt"),
+                        help="Model weights; the layout is saved as layout.json in the same directory")
+    parser.add_argument("--backend", choices=["ultralytics", "onnx", "openvino"], default="ultralytics")
+    args = parser.parse_args()
+
+    detector = create_detector(args.backend, args.model, warmup=0)
+    screenshot = ScreenCapture().capture()
+    roi = detector.detect(screenshot)
+    print(f"Detected ROIs: {sorted(roi)}")
+
+    if 'reference' not in roi or 'question' not in roi:
+        print("Reference or question area not found, open the test screen and try again")
+        return
+
+    save_layout(layout_path(args.model), screenshot, roi)
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,16 @@
+import argparse
+import os
+from src.detector import export_model
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the YOLO weights for the ONNX Runtime / OpenVINO backends")
+    parser.add_argument("backend", choices=["onnx", "openvino"])
+    parser.add_argument("--model", default=os.path.join("models", "best.pt"))
+    parser.add_argument("--imgsz", type=int, default=640, help="Fixed letterboxed input size")
+    args = parser.parse_args()
+
+    path = export_model(args.model, args.backend, args.imgsz)
+    print(f"Exported to {path}")
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -1,58 +1,189 @@
 import sys
 import os
-from PyQt5.QtWidgets import QApplication, QMainWindow, QPushButton, QVBoxLayout, QWidget, QLabel, QHBoxLayout
-from PyQt5.QtCore import Qt, QThread, pyqtSignal
+import gc
+import time
+import threading
+from PyQt5.QtWidgets import QApplication, QMainWindow, QPushButton, QVBoxLayout, QWidget, QLabel, QHBoxLayout, QComboBox, QSpinBox, QCheckBox
+from PyQt5.QtCore import Qt, QThread, QObject, QTimer, pyqtSignal
 from src.bot import Bot
+from src.debug_sink import DebugSink
+from src.overlay import OverlayWindow
+from src.pipeline import Pipeline
+from src.metrics import StatsWriter
+from src.alloc_report import AllocationReport
+from src.detector import BACKENDS, create_detector
+from src.scheduler import FrameScheduler
+
+# Detection frame widths offered in the GUI
+DETECT_WIDTHS = ("Native", "1280 px", "960 px", "640 px")
+
+class OverlayBridge(QObject):
+    # Forwards highlights from the pipeline threads to the overlay on the GUI thread
+    highlight_signal = pyqtSignal(object)
+    
+    def highlight_answer(self, box_coords):
+        self.highlight_signal.emit([box_coords])
+    
+    def highlight_boxes(self, boxes):
+        self.highlight_signal.emit(list(boxes))
+    
+    def close(self):
+        # The overlay itself is closed by MainWindow
+        pass
+
+class BotFactory:
+    def __init__(self, model_path, overlay):
+        # Builds the Bot (detector, screen capture, caches) once and keeps it alive
+        # across Stop/Start; only a different backend setting builds a new one
+        self.model_path = model_path
+        self.overlay = overlay
+        self.lock = threading.Lock()
+        self.bot = None
+        self.config = None
+    
+    def get(self, backend, isolated=False, status=None):
+        # Blocks while another thread (the preload) is building the same bot
+        with self.lock:
+            config = (backend, isolated)
+            if self.bot is not None and self.config == config:
+                return self.bot
+            self.close()
+            
+            if status:
+                status(f"Loading {backend} detector...")
+            start = time.time()
+            detector = create_detector(backend, self.model_path, isolated=isolated)
+            # Debug images are configured per run by BotThread
+            self.bot = Bot(self.model_path, self.overlay, detector=detector,
+                           debug_sink=DebugSink(directory="debug_images"),
+                           reference_cache_path=os.path.join("models", "reference_cache.npz"),
+                           answer_cache_path=os.path.join("models", "answer_cache.json"))
+            self.config = config
+            print(f"Bot ready in {(time.time() - start)*1000:.0f}ms ({backend})")
+            return self.bot
+    
+    def close(self):
+        if self.bot is not None:
+            self.bot.cleanup()
+            self.bot = None
+            self.config = None
+            # The old model may sit in reference cycles; make sure they are collectable
+            gc.unfreeze()
+            gc.collect()
+
+class PreloadThread(QThread):
+    status_signal = pyqtSignal(str)
+    
+    def __init__(self, factory, backend, isolated=False):
+        super().__init__()
+        self.factory = factory
+        self.backend = backend
+        self.isolated = isolated
+    
+    def run(self):
+        # Load and warm up the model in the background so Start doesn't wait for it
+        try:
+            self.factory.get(self.backend, self.isolated, status=self.status_signal.emit)
+            self.status_signal.emit(f"Ready ({self.backend} detector loaded)")
+        except Exception as e:
+            # Start will try again and report the error
+            print(f"Preload failed: {str(e)}")
+            self.status_signal.emit(f"Preload failed: {str(e)}")
 
 class BotThread(QThread):
     status_signal = pyqtSignal(str)
+    stats_signal = pyqtSignal(str)
     
-    def __init__(self, model_path):
+    def __init__(self, factory, scheduler, backend="ultralytics", isolated=False, alloc_report=False,
+                 detect_width=None, debug_sample_rate=0.0, debug_on_anomaly=False):
         super().__init__()
-        self.model_path = model_path
+        self.factory = factory
+        self.scheduler = scheduler
+        self.backend = backend
+        # Detector in its own worker process (restarted if it crashes)
+        self.isolated = isolated
+        # tracemalloc report of memory growth (slows the frame loop down while enabled)
+        self.alloc_report = alloc_report
+        # Detect on a frame downscaled to this width (None = native resolution)
+        self.detect_width = detect_width
+        # Debug image capture: fraction of sampled frames, and frames flagged as anomalies
+        self.debug_sample_rate = debug_sample_rate
+        self.debug_on_anomaly = debug_on_anomaly
+        # Time-to-first-answer is measured from the Start click
+        self.started_at = time.time()
         self.bot = None
-        self.running = False
+        self.pipeline = None
+        # Set by stop(); the stats loop waits on it, so stopping doesn't wait out a poll
+        self.stop_event = threading.Event()
         
     def run(self):
         try:
-            self.bot = Bot(self.model_path)
-            self.running = True
+            self.bot = self.factory.get(self.backend, self.isolated, status=self.status_signal.emit)
+            self.bot.reset(self.started_at)
+            self.bot.set_detect_width(self.detect_width)
+            self.bot.debug_sink.configure(self.debug_sample_rate, self.debug_on_anomaly)
+            # Model and caches live for the whole run: move them out of the GC's
+            # generations so full collections during the run don't walk them.
+            # Undone when the run ends, so a released model can be collected again.
+            gc.collect()
+            gc.freeze()
+            self.pipeline = Pipeline(self.bot, scheduler=self.scheduler,
+                                     on_error=self.status_signal.emit)
+            stats_writer = StatsWriter(self.bot.metrics, os.path.join("logs", "bot_stats.csv"))
+            alloc_report = None
+            if self.alloc_report:
+                alloc_report = AllocationReport(os.path.join("logs", "alloc_report.jsonl"))
+            self.pipeline.start()
             self.status_signal.emit("Bot started")
             
-            while self.running:
-                try:
-                    self.bot.process_frame()
-                except Exception as e:
-                    # Log error tapi tetap lanjutkan
-                    print(f"Error in processing frame: {str(e)}")
-                    self.status_signal.emit(f"Error: {str(e)}")
-                    # Jeda sejenak sebelum mencoba lagi
-                    self.msleep(500)
-                
-                # Slow down the loop slightly
-                self.msleep(30)  # ~33 fps
-                
-            self.bot.cleanup()
+            # Stages run on their own threads; report queue depths and latencies once per second
+            while not self.stop_event.wait(1.0):
+                self.status_signal.emit(self.pipeline.format_stats())
+                self.stats_signal.emit(self.bot.metrics.format_table())
+                stats_writer.maybe_write()
+                if alloc_report is not None:
+                    alloc_report.maybe_report()
+            
+            # Shutdown runs here, not on the GUI thread; the GUI waits for finished.
+            # The bot itself stays loaded for the next Start
+            self.status_signal.emit("Stopping...")
+            self.pipeline.stop()
+            stats_writer.write()
+            if alloc_report is not None:
+                alloc_report.report()
+                alloc_report.stop()
+            self.bot.save_caches()
             self.status_signal.emit("Bot stopped")
         except Exception as e:
             # Error fatal yang menyebabkan bot harus berhenti
             print(f"Fatal error: {str(e)}")
             self.status_signal.emit(f"Bot crashed: {str(e)}")
-            self.running = False
+        finally:
+            gc.unfreeze()
     
     def stop(self):
-        self.running = False
-        self.wait()
+        # Returns at once; run() stops the pipeline and saves the caches, then emits finished
+        self.stop_event.set()
 
 class MainWindow(QMainWindow):
     def __init__(self):
         super().__init__()
         self.bot_thread = None
+        self.overlay = None
+        self.overlay_bridge = OverlayBridge()
+        self.scheduler = FrameScheduler()
+        self.bot_factory = BotFactory(os.path.join("models", "best.pt"), self.overlay_bridge)
+        self.preload_thread = None
+        # Set once the window was asked to close; it closes when the threads have finished
+        self.closing = False
         self.init_ui()
         
+        # Start loading the model once the window is up
+        QTimer.singleShot(0, self.preload)
+        
     def init_ui(self):
         self.setWindowTitle("Sikap Kerja Bot")
-        self.setGeometry(100, 100, 400, 200)
+        self.setGeometry(100, 100, 520, 360)
         
         # Main widget and layout
         main_widget = QWidget()
@@ -64,6 +195,57 @@ class MainWindow(QMainWindow):
         self.status_label.setAlignment(Qt.AlignCenter)
         main_layout.addWidget(self.status_label)
         
+        # Stats panel (per-stage latency percentiles and counters)
+        self.stats_label = QLabel("")
+        self.stats_label.setStyleSheet("font-family: monospace;")
+        main_layout.addWidget(self.stats_label)
+        
+        # Detector backend
+        self.backend_combo = QComboBox()
+        self.backend_combo.addItems(BACKENDS)
+        self.backend_combo.currentTextChanged.connect(self.preload)
+        main_layout.addWidget(self.backend_combo)
+        self.isolated_check = QCheckBox("Run detector in a separate process")
+        self.isolated_check.toggled.connect(self.preload)
+        main_layout.addWidget(self.isolated_check)
+        
+        # Detection resolution; symbols are always cropped at full resolution
+        detect_layout = QHBoxLayout()
+        detect_layout.addWidget(QLabel("Detect at"))
+        self.detect_combo = QComboBox()
+        self.detect_combo.addItems(DETECT_WIDTHS)
+        detect_layout.addWidget(self.detect_combo)
+        main_layout.addLayout(detect_layout)
+        self.alloc_check = QCheckBox("Write allocation report (logs/alloc_report.jsonl)")
+        main_layout.addWidget(self.alloc_check)
+        
+        # Debug images (debug_images/): a sample of frames and/or anomalous frames
+        debug_layout = QHBoxLayout()
+        debug_layout.addWidget(QLabel("Debug sample %"))
+        self.debug_sample_spin = QSpinBox()
+        self.debug_sample_spin.setRange(0, 100)
+        self.debug_sample_spin.setValue(0)
+        debug_layout.addWidget(self.debug_sample_spin)
+        self.debug_anomaly_check = QCheckBox("Save anomalies")
+        debug_layout.addWidget(self.debug_anomaly_check)
+        main_layout.addLayout(debug_layout)
+        
+        # Frame rate caps: full rate on changes, backs off to the idle rate otherwise
+        fps_layout = QHBoxLayout()
+        fps_layout.addWidget(QLabel("Max FPS"))
+        self.max_fps_spin = QSpinBox()
+        self.max_fps_spin.setRange(1, 60)
+        self.max_fps_spin.setValue(self.scheduler.max_fps)
+        self.max_fps_spin.valueChanged.connect(self.update_fps_limits)
+        fps_layout.addWidget(self.max_fps_spin)
+        fps_layout.addWidget(QLabel("Idle FPS"))
+        self.min_fps_spin = QSpinBox()
+        self.min_fps_spin.setRange(1, 60)
+        self.min_fps_spin.setValue(self.scheduler.min_fps)
+        self.min_fps_spin.valueChanged.connect(self.update_fps_limits)
+        fps_layout.addWidget(self.min_fps_spin)
+        main_layout.addLayout(fps_layout)
+        
         # Buttons layout
         button_layout = QHBoxLayout()
         
@@ -82,27 +264,83 @@ class MainWindow(QMainWindow):
         
     def start_bot(self):
         if not self.bot_thread:
-            model_path = os.path.join("models", "yolo_model.pt")
-            self.bot_thread = BotThread(model_path)
+            # Overlay must be created on the GUI thread
+            if self.overlay is None:
+                self.overlay = OverlayWindow()
+                # Queued: the slot always runs on the GUI thread, never in a worker
+                self.overlay_bridge.highlight_signal.connect(self.overlay.highlight_boxes,
+                                                             Qt.QueuedConnection)
+            
+            self.bot_thread = BotThread(self.bot_factory, self.scheduler,
+                                        backend=self.backend_combo.currentText(),
+                                        isolated=self.isolated_check.isChecked(),
+                                        alloc_report=self.alloc_check.isChecked(),
+                                        detect_width=self.selected_detect_width(),
+                                        debug_sample_rate=self.debug_sample_spin.value() / 100,
+                                        debug_on_anomaly=self.debug_anomaly_check.isChecked())
             self.bot_thread.status_signal.connect(self.update_status)
+            self.bot_thread.stats_signal.connect(self.update_stats)
+            self.bot_thread.finished.connect(self.bot_finished)
             self.bot_thread.start()
             
             self.start_button.setEnabled(False)
             self.stop_button.setEnabled(True)
     
     def stop_bot(self):
-        if self.bot_thread and self.bot_thread.isRunning():
+        # Start is enabled again by bot_finished, once the caches are saved
+        if self.bot_thread:
             self.bot_thread.stop()
-            self.bot_thread = None
-            
-            self.start_button.setEnabled(True)
             self.stop_button.setEnabled(False)
     
+    def bot_finished(self):
+        # Stopped or crashed; run() has returned, so this wait is immediate
+        self.bot_thread.wait()
+        self.bot_thread = None
+        self.start_button.setEnabled(True)
+        self.stop_button.setEnabled(False)
+        if self.closing:
+            self.close()
+    
+    def preload_finished(self):
+        # finished is emitted just before the thread ends; wait so isRunning() is False
+        self.preload_thread.wait()
+        if self.closing:
+            self.close()
+    
+    def preload(self):
+        # Background load of the selected detector; skipped while one is loading or running
+        if self.bot_thread or (self.preload_thread and self.preload_thread.isRunning()):
+            return
+        self.preload_thread = PreloadThread(self.bot_factory, self.backend_combo.currentText(),
+                                            self.isolated_check.isChecked())
+        self.preload_thread.status_signal.connect(self.update_status)
+        self.preload_thread.finished.connect(self.preload_finished)
+        self.preload_thread.start()
+    
+    def selected_detect_width(self):
+        text = self.detect_combo.currentText()
+        return None if text == "Native" else int(text.split()[0])
+    
+    def update_fps_limits(self):
+        self.scheduler.set_limits(self.max_fps_spin.value(), self.min_fps_spin.value())
+    
     def update_status(self, status):
         self.status_label.setText(status)
     
+    def update_stats(self, stats):
+        self.stats_label.setText(stats)
+    
     def closeEvent(self, event):
+        # Threads still running are stopped and the close is retried when they finish,
+        # so the window never blocks on a shutdown or a model load
+        self.closing = True
         self.stop_bot()
+        if self.bot_thread or (self.preload_thread and self.preload_thread.isRunning()):
+            event.ignore()
+            return
+        self.bot_factory.close()
+        if self.overlay is not None:
+            self.overlay.close()
         event.accept()
 
 if __name__ == "__main__":
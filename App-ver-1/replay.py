@@ -0,0 +1,73 @@
+import argparse
+import json
+import os
+from src.alloc_report import AllocationReport
+from src.bot import Bot
+from src.debug_sink import DebugSink
+from src.detector import BACKENDS, GroundTruthDetector, create_detector
+from src.replay import NullOverlay, ReplaySource, run_replay
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded frames through the bot pipeline")
+    parser.add_argument("source", help="Directory of screenshots or a video file")
+    parser.add_argument("--model", default=os.path.join("models", "best.pt"), help="YOLO model path")
+    parser.add_argument("--ground-truth", action="store_true",
+                        help="Use ROIs from the sidecar labels instead of running the detector")
+    parser.add_argument("--backend", choices=BACKENDS, default="ultralytics")
+    parser.add_argument("--imgsz", type=int, default=640, help="Letterbox size for onnx/openvino")
+    parser.add_argument("--threads", type=int, default=None, help="Detector CPU threads")
+    parser.add_argument("--detector-process", action="store_true",
+                        help="Run the detector in a separate worker process")
+    parser.add_argument("--detector-timeout", type=float, default=None,
+                        help="Seconds per detection before the worker process is restarted "
+                             "(default: adapts to the measured detection time)")
+    parser.add_argument("--detect-width", type=int, default=None,
+                        help="Detect on a copy downscaled to this width (default: native resolution)")
+    parser.add_argument("--debug-sample-rate", type=float, default=0.0,
+                        help="Fraction of frames whose debug images are saved (0.0 - 1.0)")
+    parser.add_argument("--debug-on-anomaly", action="store_true",
+                        help="Save the debug images of frames flagged as anomalies")
+    parser.add_argument("--debug-dir", default="debug_images", help="Where debug images are written")
+    parser.add_argument("--max-frames", type=int, default=None)
+    parser.add_argument("--report", default=None, help="Write the full report as JSON to this path")
+    parser.add_argument("--alloc-report", default=None,
+                        help="Trace allocations and append memory growth reports (JSON lines) to this path")
+    parser.add_argument("--alloc-warmup", type=float, default=5.0,
+                        help="Seconds before the allocation baseline is taken")
+    parser.add_argument("--alloc-interval", type=float, default=60.0,
+                        help="Seconds between allocation reports")
+    args = parser.parse_args()
+
+    source = ReplaySource(args.source)
+    if args.ground_truth:
+        detector = GroundTruthDetector(source)
+    else:
+        detector = create_detector(args.backend, args.model, imgsz=args.imgsz, threads=args.threads,
+                                   isolated=args.detector_process, timeout=args.detector_timeout)
+    debug_sink = DebugSink(directory=args.debug_dir)
+    debug_sink.configure(args.debug_sample_rate, args.debug_on_anomaly)
+    bot = Bot(args.model, NullOverlay(), detector=detector, screen_capture=source,
+              detect_width=args.detect_width, debug_sink=debug_sink)
+
+    alloc_report = None
+    if args.alloc_report:
+        alloc_report = AllocationReport(args.alloc_report, interval=args.alloc_interval,
+                                        warmup=args.alloc_warmup)
+    report = run_replay(bot, source, max_frames=args.max_frames, alloc_report=alloc_report)
+    if alloc_report is not None:
+        alloc_report.stop()
+    bot.cleanup()
+
+    print(f"Frames: {report['frames']}, {report['fps']:.1f} frames/sec, "
+          f"YOLO skip rate: {report['yolo_skip_rate']*100:.1f}%")
+    if report['accuracy'] is not None:
+        print(f"Accuracy: {report['correct']}/{report['labelled']} ({report['accuracy']*100:.1f}%)")
+    print(bot.metrics.format_table())
+
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.report}")
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,48 @@
+import argparse
+import os
+import signal
+from src.detector import BACKENDS, create_detector
+from src.service import SolverService, create_server
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless solver service for other local tools")
+    parser.add_argument("--model", default=os.path.join("models", "best.pt"), help="YOLO model path")
+    parser.add_argument("--backend", choices=BACKENDS, default="ultralytics")
+    parser.add_argument("--imgsz", type=int, default=640, help="Letterbox size for onnx/openvino")
+    parser.add_argument("--threads", type=int, default=None, help="Detector CPU threads")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix", default=None, help="Listen on this Unix socket path instead of TCP")
+    parser.add_argument("--max-batch", type=int, default=8, help="Most frames per detector call")
+    parser.add_argument("--batch-window-ms", type=float, default=5.0,
+                        help="How long to wait for concurrent requests to join a batch")
+    args = parser.parse_args()
+
+    # Loaded and warmed up once, before accepting connections
+    detector = create_detector(args.backend, args.model, imgsz=args.imgsz, threads=args.threads)
+    service = SolverService(detector, max_batch=args.max_batch, batch_window=args.batch_window_ms / 1000)
+
+    if args.unix and os.path.exists(args.unix):
+        os.remove(args.unix)
+    server = create_server(service, args.host, args.port, args.unix)
+    print(f"Solver service listening on {args.unix or f'{args.host}:{args.port}'}")
+
+    def stop(signum, frame):
+        raise KeyboardInterrupt
+    # Stop cleanly on SIGTERM (service managers) as well as Ctrl+C
+    signal.signal(signal.SIGTERM, stop)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+        if hasattr(detector, 'close'):
+            detector.close()
+        if args.unix and os.path.exists(args.unix):
+            os.remove(args.unix)
+        print(f"Solver service stopped; {service.metrics.format_table()}")
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,93 @@
+import gc
+import json
+import os
+import time
+import tracemalloc
+
+class AllocationReport:
+    def __init__(self, path=None, interval=60.0, warmup=30.0, top=10):
+        # tracemalloc-based check that the frame loop's memory stays flat over a long run.
+        # The baseline is taken after `warmup` seconds (caches, buffer pools and model
+        # warm-up allocate once); later reports show growth since then per source line.
+        # path: reports are appended as JSON lines; None only prints them
+        self.path = path
+        self.interval = interval
+        self.warmup = warmup
+        self.top = top
+
+        # Frames keep the allocation site and its caller; one frame is enough for most lines
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(2)
+        self.started_at = time.time()
+        self.baseline = None
+        self.baseline_at = None
+        self.last_report = self.started_at
+        self.filters = [tracemalloc.Filter(False, tracemalloc.__file__),
+                        tracemalloc.Filter(False, "<frozen importlib._bootstrap*>")]
+
+    def snapshot(self):
+        # Collect first so reference cycles waiting for the GC don't look like leaks
+        gc.collect()
+        return tracemalloc.take_snapshot().filter_traces(self.filters)
+
+    def take_baseline(self):
+        self.baseline = self.snapshot()
+        self.baseline_at = time.time()
+        # Peak from here on, not from model loading
+        tracemalloc.reset_peak()
+        print(f"Allocation report: baseline taken after {self.baseline_at - self.started_at:.0f}s")
+
+    def maybe_report(self):
+        now = time.time()
+        if self.baseline is None:
+            if now - self.started_at >= self.warmup:
+                self.take_baseline()
+                self.last_report = now
+            return None
+        if now - self.last_report < self.interval:
+            return None
+        return self.report()
+
+    def report(self):
+        if self.baseline is None:
+            self.take_baseline()
+
+        self.last_report = time.time()
+        snapshot = self.snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        stats = snapshot.compare_to(self.baseline, 'lineno')
+        growth = sum(stat.size_diff for stat in stats)
+        elapsed = self.last_report - self.baseline_at
+
+        report = {
+            'time': self.last_report,
+            'since_baseline_s': elapsed,
+            'current_kib': current / 1024,
+            'peak_kib': peak / 1024,
+            'growth_kib': growth / 1024,
+            # Linear projection, e.g. over an 8-hour shift
+            'growth_kib_per_hour': growth / 1024 / elapsed * 3600 if elapsed > 0 else 0.0,
+            'gc_collections': [generation['collections'] for generation in gc.get_stats()],
+            'top': [{'line': str(stat.traceback[0]), 'size_diff_kib': stat.size_diff / 1024,
+                     'count_diff': stat.count_diff}
+                    for stat in sorted(stats, key=lambda s: s.size_diff, reverse=True)[:self.top]
+                    if stat.size_diff > 0],
+        }
+
+        print(f"Allocation report: current {report['current_kib']:.0f} KiB, "
+              f"peak {report['peak_kib']:.0f} KiB, growth {report['growth_kib']:+.1f} KiB "
+              f"in {elapsed:.0f}s ({report['growth_kib_per_hour']:+.1f} KiB/h)")
+        for entry in report['top'][:3]:
+            print(f"  {entry['size_diff_kib']:+.1f} KiB ({entry['count_diff']:+d}) {entry['line']}")
+
+        if self.path:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.path, 'a') as f:
+                f.write(json.dumps(report) + "\n")
+        return report
+
+    def stop(self):
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
\ No newline at end of file
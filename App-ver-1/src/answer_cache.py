@@ -0,0 +1,66 @@
+import json
+import os
+from .fingerprint import KEY_FORMAT, REGION_THRESHOLDS, hamming_distance
+from .fingerprint_cache import FingerprintCache
+
+class AnswerCache(FingerprintCache):
+    def __init__(self, capacity=1024, max_distance=None, min_margin=0.05, path=None):
+        # LRU cache of answers keyed by the (column, question) pHashes the change
+        # detectors already compute, so a lookup needs no fingerprint of its own.
+        # path: optional JSON file used to keep answers across runs
+        super().__init__(capacity, path)
+        # (column, question) bits a pair may differ by and still be the same screen;
+        # defaults to the change thresholds, "same screen" means the same thing everywhere
+        if max_distance is None:
+            max_distance = (REGION_THRESHOLDS['column'], REGION_THRESHOLDS['question'])
+        self.max_distance = max_distance
+        # Only answers whose loss-matrix margin reaches this are cached
+        self.min_margin = min_margin
+
+        if self.path and os.path.exists(self.path):
+            self.load()
+
+    def get(self, ref_key, question_key):
+        # Nearest entry whose fingerprints are both close enough
+        max_ref, max_question = self.max_distance
+        def distance(cached):
+            ref_distance = hamming_distance(ref_key, cached[0])
+            question_distance = hamming_distance(question_key, cached[1])
+            if ref_distance > max_ref or question_distance > max_question:
+                return None
+            return ref_distance + question_distance
+        return self.lookup((ref_key, question_key), distance)
+
+    def put(self, ref_key, question_key, answer, margin):
+        # Returns True if the answer was confident enough to cache
+        if answer is None or margin < self.min_margin:
+            return False
+        self.store((ref_key, question_key), answer)
+        return True
+
+    def save(self):
+        if not self.path:
+            return
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        entries = [[f"{ref_key:x}", f"{question_key:x}", answer]
+                   for (ref_key, question_key), answer in self.entries.items()]
+        with open(self.path, 'w') as f:
+            json.dump({'key_format': KEY_FORMAT, 'entries': entries}, f)
+        print(f"Answer cache saved: {len(entries)} answers to {self.path}")
+
+    def load(self):
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+            if data.get('key_format') != KEY_FORMAT:
+                print(f"Answer cache {self.path} uses old keys, starting empty")
+                return
+            for ref_key, question_key, answer in data['entries']:
+                self.entries[(int(ref_key, 16), int(question_key, 16))] = answer
+            print(f"Answer cache loaded: {len(self.entries)} answers from {self.path}")
+        except Exception as e:
+            print(f"Could not load answer cache: {str(e)}")
+            self.entries.clear()
\ No newline at end of file
@@ -0,0 +1,106 @@
+import csv
+import json
+import os
+import time
+import cv2
+from .detector import create_detector
+from .replay import IMAGE_EXTENSIONS, load_labels
+from .symbol_processor import SymbolProcessor
+
+# Per-process state, created once by init_worker in every pool worker
+worker = {}
+
+def list_images(directory):
+    names = sorted(n for n in os.listdir(directory) if n.lower().endswith(IMAGE_EXTENSIONS))
+    return [os.path.join(directory, n) for n in names]
+
+def init_worker(backend, model_path, imgsz=640, threads=1, ground_truth=False):
+    # Runs once per worker process: the model is loaded here, not per image.
+    # One thread per worker so the pool, not the libraries, spreads work over the cores.
+    cv2.setNumThreads(threads or 1)
+    worker['detector'] = None if ground_truth else create_detector(
+        backend, model_path, imgsz=imgsz, threads=threads, warmup=1)
+    worker['symbol_processor'] = SymbolProcessor()
+
+def solve_image(image_path):
+    # Detect, extract and solve one screenshot on its own (no tracking or caches),
+    # so every image of an archive is judged independently
+    result = {'image': os.path.basename(image_path), 'answer': None, 'expected': None,
+              'margin': None, 'losses': None, 'timings': {}, 'error': None}
+    timings = result['timings']
+    start = time.perf_counter()
+
+    def lap(name, began):
+        timings[name] = (time.perf_counter() - began) * 1000
+        return time.perf_counter()
+
+    try:
+        t = time.perf_counter()
+        image = cv2.imread(image_path)
+        if image is None:
+            raise ValueError("could not read image")
+        labels = load_labels(os.path.splitext(image_path)[0] + ".json") or {}
+        result['expected'] = labels.get('answer')
+        t = lap('read', t)
+
+        detector = worker['detector']
+        if detector is None:
+            # Ground truth mode: ROIs come from the sidecar labels
+            roi = {key: tuple(int(v) for v in box) for key, box in labels.get('roi', {}).items()}
+        else:
+            roi = detector.detect(image)
+        t = lap('detect', t)
+        if 'reference' not in roi or 'question' not in roi:
+            raise ValueError("reference or question area not found")
+
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        processor = worker['symbol_processor']
+        x1, y1, x2, y2 = roi['reference']
+        ref_symbols = processor.extract_reference_symbols(gray[y1:y2, x1:x2])
+        t = lap('reference', t)
+        x1, y1, x2, y2 = roi['question']
+        question_symbols = processor.extract_question_symbols(gray[y1:y2, x1:x2])
+        t = lap('question', t)
+
+        solved = processor.solve_missing_symbol(ref_symbols, question_symbols)
+        lap('matching', t)
+        result['answer'] = solved['answer']
+        result['margin'] = float(solved['margin'])
+        if solved['losses'] is not None:
+            result['losses'] = [[round(float(v), 5) for v in row] for row in solved['losses']]
+    except Exception as e:
+        result['error'] = str(e)
+
+    timings['total'] = (time.perf_counter() - start) * 1000
+    return result
+
+class ResultWriter:
+    TIMINGS = ('read', 'detect', 'reference', 'question', 'matching', 'total')
+
+    def __init__(self, path):
+        # .csv -> one row per image (losses as a JSON string), anything else -> JSON lines
+        self.path = path
+        self.csv = path.lower().endswith('.csv')
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.file = open(path, 'w', newline='')
+        if self.csv:
+            self.writer = csv.writer(self.file)
+            self.writer.writerow(['image', 'answer', 'expected', 'margin']
+                                 + [f"{name}_ms" for name in self.TIMINGS] + ['losses', 'error'])
+
+    def write(self, result):
+        if self.csv:
+            timings = result['timings']
+            self.writer.writerow(
+                [result['image'], result['answer'] or '', result['expected'] or '',
+                 '' if result['margin'] is None else f"{result['margin']:.5f}"]
+                + ['' if name not in timings else f"{timings[name]:.2f}" for name in self.TIMINGS]
+                + [json.dumps(result['losses']) if result['losses'] is not None else '',
+                   result['error'] or ''])
+        else:
+            self.file.write(json.dumps(result) + "\n")
+
+    def close(self):
+        self.file.close()
\ No newline at end of file
@@ -1,39 +1,99 @@
-from ultralytics import YOLO
-import numpy as np
 import cv2
 import time
 from .screen_capture import ScreenCapture
+from .detector import YoloDetector, scale_roi
 from .symbol_processor import SymbolProcessor
-from .overlay import OverlayWindow
+from .roi_tracker import RoiTracker
+from .reference_cache import ReferenceCache
+from .debug_sink import DebugSink
+from .metrics import Metrics
+from .answer_cache import AnswerCache
+from .fingerprint import REGION_THRESHOLDS, ChangeDetector
+from .buffer_pool import BufferPool
 
 class Bot:
-    def __init__(self, model_path):
-        # Initialize YOLO model
-        self.model = YOLO("models/best.pt")
+    def __init__(self, model_path, overlay, reference_cache_path=None, debug_sink=None,
+                 detector=None, screen_capture=None, answer_cache_path=None, detect_width=None):
+        # Initialize ROI detector (YOLO unless another detector is passed in)
+        self.detector = detector if detector is not None else YoloDetector(model_path)
         
-        # Initialize screen capture
-        self.screen_capture = ScreenCapture()
+        # Initialize screen capture (live screen unless another frame source is passed in)
+        self.screen_capture = screen_capture if screen_capture is not None else ScreenCapture()
         
-        # Get initial screen size to set model image size
-        initial_screenshot = self.screen_capture.capture()
-        self.screen_height, self.screen_width = initial_screenshot.shape[:2]
+        # Get initial screen size from the monitor
+        self.screen_width = self.screen_capture.monitor['width']
+        self.screen_height = self.screen_capture.monitor['height']
         print(f"Screen dimensions: {self.screen_width}x{self.screen_height}")
         
-        # Initialize symbol processor
-        self.symbol_processor = SymbolProcessor()
+        # Detection runs on a copy downscaled to this width, so its cost doesn't grow with
+        # the monitor; symbols are still cropped from the full-resolution frame.
+        # None = detect at native resolution
+        self.detect_width = detect_width
+        self.update_detect_scale()
         
-        # Initialize overlay window
-        self.overlay = OverlayWindow()
+        # Initialize symbol processor; debug images are off unless a sink is passed in
+        self.debug_sink = debug_sink if debug_sink is not None else DebugSink()
+        self.symbol_processor = SymbolProcessor(self.debug_sink)
         
-        # Cache for reference symbols
+        # Overlay is owned by the GUI thread; anything with highlight_answer(box) works
+        self.overlay = overlay
+        
+        # Tracker strips and the detection frame are written into reused buffers,
+        # so the steady-state frame loop doesn't allocate new arrays
+        self.buffer_pool = BufferPool()
+        
+        # Track the last detected layout so YOLO only runs when it moves
+        self.roi_tracker = RoiTracker(pool=self.buffer_pool)
+        
+        # Extra pixels grabbed around the tracked boxes in region capture mode
+        self.capture_margin = 8
+        
+        # Cache for reference symbols; the column counts as changed once its
+        # pHash differs in more bits than the column threshold
         self.ref_symbols = None
-        self.ref_hash = None
+        self.column_detector = ChangeDetector('column')
         self.column_index = 0
         
+        # Previously seen columns, so repeated columns skip extraction.
+        # Keyed by the same column fingerprint, "same column" means the same thing.
+        self.reference_cache = ReferenceCache(max_distance=REGION_THRESHOLDS['column'],
+                                              path=reference_cache_path)
+        
+        # Answers of previously solved (column, question) pairs, keyed by the
+        # detectors' pHashes
+        self.answer_cache = AnswerCache(path=answer_cache_path)
+        self.ref_key = None
+        
+        # Fingerprint of the last solved question and its answer
+        self.question_detector = ChangeDetector('question')
+        self.last_answer = None
+        self.skipped_frames = 0
+        
         # Performance tracking
         self.last_process_time = 0
+        self.metrics = Metrics()
+        
+        # Time from the start of a run to its first highlighted answer
+        self.run_started_at = time.time()
+        self.first_answer_time = None
+        
+    def reset(self, started_at=None):
+        # Start a new run with the same detector, capture and caches (Stop/Start in the GUI).
+        # The tracked layout is kept; it is re-validated against the first frame anyway.
+        self.ref_symbols = None
+        self.column_detector.reset()
+        self.ref_key = None
+        self.question_detector.reset()
+        self.last_answer = None
+        self.skipped_frames = 0
+        self.metrics = Metrics()
+        self.run_started_at = started_at if started_at is not None else time.time()
+        self.first_answer_time = None
+    
+    def detect_roi(self, screenshot, gray=None):
+        # Tracking only needs grayscale; use the frame's shared gray copy if there is one
+        tracked = gray if gray is not None else screenshot
         
-    def detect_roi(self, screenshot):
         # Get current screenshot dimensions
         height, width = screenshot.shape[:2]
         
@@ -41,104 +101,219 @@ class Bot:
         if height != self.screen_height or width != self.screen_width:
             self.screen_height, self.screen_width = height, width
             print(f"Screen dimensions updated: {width}x{height}")
+            self.roi_tracker.reset()
+            self.update_detect_scale()
         
-        # Run inference with YOLO using dynamic image size
-        results = self.model(
-            screenshot, 
-            conf=0.8,      # Confidence threshold
-            imgsz=width,    # Use screen width to maintain aspect ratio
-        )
+        # Reuse the previous boxes if the layout hasn't moved
+        roi = self.roi_tracker.lookup(tracked)
+        if roi is not None:
+            return roi
         
-        roi = {}
-        
-        # Process detection results
-        for result in results:
-            boxes = result.boxes  # Bounding boxes
-            
-            for box in boxes:
-                # Get box coordinates
-                x1, y1, x2, y2 = box.xyxy[0].cpu().numpy().astype(int)
-                
-                # Get class id and convert to class name
-                class_id = int(box.cls[0].item())
-                class_name = result.names[class_id]
-                
-                # Map class to ROI
-                if class_name == 'REFERENSI':
-                    roi['reference'] = (x1, y1, x2, y2)
-                elif class_name == 'SOAL':
-                    roi['question'] = (x1, y1, x2, y2)
-                elif class_name in ['A', 'B', 'C', 'D', 'E']:
-                    roi[f'option_{class_name.lower()}'] = (x1, y1, x2, y2)
+        with self.metrics.time('yolo'):
+            if self.detect_size is None:
+                roi = self.detector.detect(screenshot)
+            else:
+                w, h = self.detect_size
+                small = cv2.resize(screenshot, self.detect_size, interpolation=cv2.INTER_AREA,
+                                   dst=self.buffer_pool.get('detect_frame', (h, w) + screenshot.shape[2:]))
+                roi = scale_roi(self.detector.detect(small), self.detect_scale, (width, height))
+        self.roi_tracker.update(tracked, roi)
         
         return roi
     
-    # Rest of the code remains the same
-    # Fungsi process_frame perlu diperbarui
+    def update_detect_scale(self):
+        # Size of the detection frame and the factors back to screen coordinates;
+        # computed once per screen size
+        self.detect_size = None
+        self.detect_scale = (1.0, 1.0)
+        if (not self.detect_width or self.screen_width <= self.detect_width
+                or not getattr(self.detector, 'accepts_downscaled', True)):
+            return
+        w = self.detect_width
+        h = max(1, int(round(self.screen_height * w / self.screen_width)))
+        self.detect_size = (w, h)
+        self.detect_scale = (self.screen_width / w, self.screen_height / h)
+        print(f"Detecting at {w}x{h} (scale {self.detect_scale[0]:.2f})")
+    
+    def set_detect_width(self, detect_width):
+        self.detect_width = detect_width
+        self.update_detect_scale()
+    
+    def load_reference_symbols(self, ref_area):
+        # Look the column up in the reference cache before extracting it.
+        # 16x16 pHash (256 bit) supaya kolom yang mirip tidak tertukar
+        key = self.column_detector.fingerprint
+        symbols = self.reference_cache.get(key)
+        if symbols is None:
+            with self.metrics.time('reference'):
+                symbols = self.symbol_processor.extract_reference_symbols(ref_area)
+            self.reference_cache.put(key, symbols)
+        return symbols
+    
+    def capture_stage(self):
+        with self.metrics.time('capture'):
+            packet = self.grab()
+        self.metrics.count('frames')
+        return packet
+    
+    def grab(self):
+        # While the layout is known, grab only the union of the tracked boxes.
+        # Tracking and solving work on the gray frame, so region grabs skip color entirely.
+        start_time = time.time()
+        regions = self.roi_tracker.regions()
+        if regions:
+            box = self.screen_capture.union_box(regions, margin=self.capture_margin)
+            if box is not None:
+                _, gray = self.screen_capture.capture_frame(box, color=False)
+                return {'frame': None, 'gray': gray, 'origin': (box[0], box[1]),
+                        'full': False, 'start_time': start_time}
+        
+        # Full monitor grab for ROI detection; the detector still needs color
+        frame, gray = self.screen_capture.capture_frame()
+        return {'frame': frame, 'gray': gray, 'origin': (0, 0), 'full': True, 'start_time': start_time}
+    
+    def detect_stage(self, packet):
+        if packet['full']:
+            roi = self.detect_roi(packet['frame'], packet['gray'])
+        else:
+            roi = self.roi_tracker.lookup(packet['gray'], packet['origin'])
+            if roi is None:
+                # Layout moved; drop this partial frame so the next grab is full.
+                # The screen did change, so the scheduler must not back off on it.
+                self.roi_tracker.reset()
+                packet['changed'] = True
+                self.finish_frame(packet)
+                return None
+        
+        # Check if all necessary ROIs are detected
+        if 'reference' not in roi or 'question' not in roi:
+            self.metrics.count('no_roi')
+            self.finish_frame(packet)
+            return None
+        
+        packet['roi'] = roi
+        return packet
+    
+    def crop(self, frame, box, origin=(0, 0)):
+        # Crop a screen-space box out of a (possibly region-limited) frame
+        x1, y1, x2, y2 = box
+        ox, oy = origin
+        return frame[max(0, y1-oy):y2-oy, max(0, x1-ox):x2-ox]
 
-    def process_frame(self):
+    def solve_stage(self, packet):
+        # Debug images of this frame are written only if it is sampled or anomalous
+        self.debug_sink.begin_frame()
         try:
-            start_time = time.time()
-            
-            # Capture screen
-            screenshot = self.screen_capture.capture()
-            
-            # Detect ROIs
-            roi = self.detect_roi(screenshot)
-            
-            # Check if all necessary ROIs are detected
-            if 'reference' not in roi or 'question' not in roi:
-                return
-            
-            # Extract reference area
-            ref_area = screenshot[roi['reference'][1]:roi['reference'][3], 
-                                roi['reference'][0]:roi['reference'][2]]
-            
-            # Gunakan metode hashing sederhana sebagai pengganti cv2.img_hash
-            gray_ref = cv2.cvtColor(ref_area, cv2.COLOR_BGR2GRAY)
-            # Resize untuk mengurangi variasi kecil
-            small_ref = cv2.resize(gray_ref, (32, 32))
-            # Flatten dan konversi ke byte array untuk perbandingan
-            current_hash = small_ref.flatten()
-            
-            # If column changed or first run
-            if self.ref_hash is None:
-                self.ref_hash = current_hash
-                self.ref_symbols = self.symbol_processor.extract_reference_symbols(ref_area)
-                self.column_index += 1
+            return self.solve_frame(packet)
+        finally:
+            self.debug_sink.end_frame()
+    
+    def solve_frame(self, packet):
+        # Symbols are extracted from the shared gray frame, no per-area color conversion
+        screenshot, origin, roi = packet['gray'], packet['origin'], packet['roi']
+        
+        # Extract reference area
+        ref_area = self.crop(screenshot, roi['reference'], origin)
+        
+        # If column changed or first run. Reference symbols are extracted lazily,
+        # an answer cache hit doesn't need them at all.
+        column_changed = self.column_detector.check(ref_area)
+        if column_changed:
+            self.column_detector.accept()
+            self.ref_symbols = None
+            self.ref_key = self.column_detector.fingerprint
+            self.column_index += 1
+            if self.column_detector.distance is None:
                 print(f"Column changed: {self.column_index}")
             else:
-                # Bandingkan hash dengan menghitung perbedaan rata-rata
-                hash_diff = np.mean(np.abs(self.ref_hash - current_hash))
-                if hash_diff > 10.0:  # Threshold untuk perubahan signifikan
-                    # Process reference symbols
-                    self.ref_symbols = self.symbol_processor.extract_reference_symbols(ref_area)
-                    self.ref_hash = current_hash
-                    self.column_index += 1
-                    print(f"Column changed: {self.column_index}, Difference: {hash_diff}")
-            
-            # Extract question area
-            question_area = screenshot[roi['question'][1]:roi['question'][3], 
-                                    roi['question'][0]:roi['question'][2]]
-            
-            # Process question symbols
-            question_symbols = self.symbol_processor.extract_question_symbols(question_area)
-            
-            # Find missing symbol
-            answer = self.symbol_processor.find_missing_symbol(self.ref_symbols, question_symbols)
+                print(f"Column changed: {self.column_index}, Difference: {self.column_detector.distance} bits, "
+                      f"cache hits/misses: {self.reference_cache.hits}/{self.reference_cache.misses}")
+        
+        # Extract question area
+        question_area = self.crop(screenshot, roi['question'], origin)
+        question_changed = self.question_detector.check(question_area)
+        
+        # Kalau kolom dan soal tidak berubah, pakai jawaban sebelumnya
+        if not column_changed and not question_changed:
+            answer = self.last_answer
+            reused = True
+            self.skipped_frames += 1
+            self.metrics.count('skips')
+        else:
+            reused = False
+            question_key = self.question_detector.current
+            answer = self.answer_cache.get(self.ref_key, question_key)
             
-            # If answer found, highlight it
-            if answer and f'option_{answer.lower()}' in roi:
-                answer_box = roi[f'option_{answer.lower()}']
-                self.overlay.highlight_answer(answer_box)
+            if answer is None:
+                if self.ref_symbols is None:
+                    self.ref_symbols = self.load_reference_symbols(ref_area)
                 
-                # Print processing time
-                self.last_process_time = time.time() - start_time
-                print(f"Answer: {answer}, Processing time: {self.last_process_time*1000:.1f}ms")
+                # Process question symbols
+                with self.metrics.time('question'):
+                    question_symbols = self.symbol_processor.extract_question_symbols(question_area)
                 
+                # Find missing symbol
+                with self.metrics.time('matching'):
+                    result = self.symbol_processor.solve_missing_symbol(self.ref_symbols, question_symbols)
+                answer = result['answer']
+                
+                # Only confident answers are remembered
+                self.answer_cache.put(self.ref_key, question_key, answer, result['margin'])
+            
+            # Compared against the last solved question, not the last frame
+            self.question_detector.accept()
+            self.last_answer = answer
+        
+        packet['answer'] = answer
+        # Lets the frame scheduler know whether anything new was on screen
+        packet['changed'] = not reused
+        return packet
+    
+    def present_stage(self, packet):
+        answer, roi = packet['answer'], packet['roi']
+        
+        # If answer found, highlight it
+        if answer and f'option_{answer.lower()}' in roi:
+            answer_box = roi[f'option_{answer.lower()}']
+            with self.metrics.time('overlay'):
+                self.overlay.highlight_answer(answer_box)
+            self.metrics.count('answers')
+            if self.first_answer_time is None:
+                self.first_answer_time = time.time() - self.run_started_at
+                print(f"Time to first answer: {self.first_answer_time*1000:.0f}ms")
+            
+            # Print processing time
+            self.finish_frame(packet)
+            print(f"Answer: {answer}, Processing time: {self.last_process_time*1000:.1f}ms, "
+                  f"YOLO skip rate: {self.roi_tracker.skip_rate()*100:.1f}%")
+        else:
+            self.finish_frame(packet)
+    
+    def finish_frame(self, packet):
+        # End-to-end latency, measured for every frame whether or not it was answered
+        self.last_process_time = time.time() - packet['start_time']
+        self.metrics.record('total', self.last_process_time)
+    
+    def process_frame(self):
+        # Run all stages back to back on the calling thread
+        try:
+            packet = self.detect_stage(self.capture_stage())
+            if packet is None:
+                return
+            self.present_stage(self.solve_stage(packet))
         except Exception as e:
+            self.metrics.count('errors')
             print(f"Error in process_frame: {str(e)}")
         
+    def save_caches(self):
+        self.reference_cache.save()
+        self.answer_cache.save()
+    
     def cleanup(self):
         # Clean up resources
+        self.save_caches()
+        self.debug_sink.close()
+        # Out-of-process detectors own a worker process and shared memory
+        if hasattr(self.detector, 'close'):
+            self.detector.close()
         self.overlay.close()
\ No newline at end of file
@@ -0,0 +1,53 @@
+import threading
+import numpy as np
+
+class BufferPool:
+    def __init__(self):
+        # Named arrays reused frame after frame through OpenCV dst= / NumPy out= arguments.
+        # One set per thread, so pipeline stages (and service clients) never share a buffer.
+        self.local = threading.local()
+
+    def storage(self):
+        if not hasattr(self.local, 'buffers'):
+            self.local.buffers = {}
+            self.local.rings = {}
+        return self.local
+
+    def get(self, name, shape, dtype=np.uint8):
+        # The same array on every call until the shape or dtype changes.
+        # Only valid until the next get() of the same name on this thread.
+        buffers = self.storage().buffers
+        buffer = buffers.get(name)
+        if buffer is None or buffer.shape != tuple(shape) or buffer.dtype != dtype:
+            buffer = np.empty(shape, dtype=dtype)
+            buffers[name] = buffer
+        return buffer
+
+    def next(self, name, shape, count, dtype=np.uint8):
+        # Ring of count arrays; each is handed out again count calls later.
+        # A new ring is allocated when the shape changes; arrays still in use stay alive.
+        rings = self.storage().rings
+        ring = rings.get(name)
+        if (ring is None or ring['shape'] != tuple(shape) or ring['dtype'] != dtype
+                or len(ring['buffers']) != count):
+            ring = {'shape': tuple(shape), 'dtype': dtype, 'index': 0,
+                    'buffers': [np.empty(shape, dtype=dtype) for _ in range(count)]}
+            rings[name] = ring
+        buffer = ring['buffers'][ring['index']]
+        ring['index'] = (ring['index'] + 1) % count
+        return buffer
+
+    def nbytes(self):
+        # Memory held by this thread's buffers
+        storage = self.storage()
+        total = sum(buffer.nbytes for buffer in storage.buffers.values())
+        for ring in storage.rings.values():
+            total += sum(buffer.nbytes for buffer in ring['buffers'])
+        return total
+
+def copy_into(target, source):
+    """Copy source into target when it fits (no allocation), otherwise return a new copy"""
+    if target is None or target.shape != source.shape or target.dtype != source.dtype:
+        return source.copy()
+    np.copyto(target, source)
+    return target
\ No newline at end of file
@@ -0,0 +1,78 @@
+import cv2
+import numpy as np
+
+class ComponentLabels:
+    def __init__(self, binary, min_area=16, labels=None):
+        # One labeling pass over a binary image (white symbols on black background).
+        # labels: optional int32 buffer of the same shape to label into (reused by callers)
+        count, self.labels, self.stats, _ = cv2.connectedComponentsWithStatsWithAlgorithm(
+            binary, 8, cv2.CV_32S, cv2.CCL_GRANA, labels=labels)
+
+        # Components smaller than min_area pixels are specks and take no part in the
+        # hierarchy; filtered first, since find_parents is quadratic in the component count.
+        # Symbols, their holes' contents and box borders are all far larger.
+        areas = self.stats[1:count, cv2.CC_STAT_AREA]
+        self.ids = [int(label) for label in np.flatnonzero(areas >= min_area) + 1]
+        self.parents = self.find_parents()
+
+        # Children of every component (0 = top level), built once
+        self.child_ids = {0: []}
+        for label in self.ids:
+            self.child_ids[label] = []
+        for label in self.ids:
+            self.child_ids[self.parents[label]].append(label)
+
+    def find_parents(self):
+        # Parent = smallest other component whose bounding box contains this one.
+        # For laid-out symbols this matches what RETR_EXTERNAL treats as nested.
+        parents = {label: 0 for label in self.ids}
+        if len(self.ids) < 2:
+            return parents
+
+        ids = np.array(self.ids)
+        x1 = self.stats[ids, cv2.CC_STAT_LEFT]
+        y1 = self.stats[ids, cv2.CC_STAT_TOP]
+        x2 = x1 + self.stats[ids, cv2.CC_STAT_WIDTH]
+        y2 = y1 + self.stats[ids, cv2.CC_STAT_HEIGHT]
+        box_area = (x2 - x1) * (y2 - y1)
+
+        # contains[i, j]: component i's box contains component j's box
+        contains = ((x1[:, None] <= x1[None, :]) & (y1[:, None] <= y1[None, :]) &
+                    (x2[:, None] >= x2[None, :]) & (y2[:, None] >= y2[None, :]) &
+                    (box_area[:, None] > box_area[None, :]))
+
+        for j in np.flatnonzero(contains.any(axis=0)):
+            containers = np.flatnonzero(contains[:, j])
+            parents[self.ids[j]] = int(ids[containers[np.argmin(box_area[containers])]])
+        return parents
+
+    def box(self, label):
+        x, y, w, h = self.stats[label, :4]
+        return int(x), int(y), int(w), int(h)
+
+    def area(self, label):
+        return int(self.stats[label, cv2.CC_STAT_AREA])
+
+    def top_level(self):
+        return list(self.child_ids[0])
+
+    def children(self, parent):
+        return list(self.child_ids.get(parent, ()))
+
+    def descendants(self, parent):
+        result = []
+        pending = self.children(parent)
+        while pending:
+            label = pending.pop()
+            result.append(label)
+            pending.extend(self.children(label))
+        return result
+
+    def contour(self, label, origin=(0, 0)):
+        # Outer contour of a single component, found on its own bounding-box crop only.
+        # Coordinates are relative to origin (in labels coordinates).
+        x, y, w, h = self.box(label)
+        mask = cv2.compare(self.labels[y:y+h, x:x+w], label, cv2.CMP_EQ)
+        contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE,
+                                       offset=(x - origin[0], y - origin[1]))
+        return max(contours, key=cv2.contourArea)
\ No newline at end of file
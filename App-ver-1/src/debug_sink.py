@@ -0,0 +1,105 @@
+import os
+import random
+import threading
+from collections import deque
+import cv2
+
+class DebugSink:
+    def __init__(self, enabled=False, sample_rate=0.0, on_anomaly=True,
+                 capacity=32, directory="debug_images"):
+        # Off by default: save() is a no-op and nothing touches the disk
+        self.enabled = enabled
+        # Fraction of frames whose debug images are written (0.0 - 1.0)
+        self.sample_rate = sample_rate
+        # Always write a frame's images when it is flagged as an anomaly
+        self.on_anomaly = on_anomaly
+        self.directory = directory
+
+        # Images staged for the current frame, written only if the frame is kept
+        self.staged = []
+        self.sampled = False
+        self.anomaly = None
+        self.frame_index = 0
+
+        # Ring buffer for the background writer; oldest entries are dropped when full
+        self.pending = deque(maxlen=capacity)
+        self.condition = threading.Condition()
+        self.worker = None
+        self.running = False
+
+        self.written = 0
+        self.dropped = 0
+
+    def configure(self, sample_rate=0.0, on_anomaly=False):
+        # Change the settings between runs; enabled only if something would be written
+        self.sample_rate = sample_rate
+        self.on_anomaly = on_anomaly
+        self.enabled = sample_rate > 0 or on_anomaly
+
+    def begin_frame(self):
+        if not self.enabled:
+            return
+        self.frame_index += 1
+        self.staged = []
+        self.anomaly = None
+        self.sampled = random.random() < self.sample_rate
+
+    def save(self, name, image):
+        if not self.enabled:
+            return
+        self.staged.append((name, image))
+
+    def flag_anomaly(self, reason):
+        if not self.enabled:
+            return
+        print(f"Debug anomaly: {reason}")
+        self.anomaly = reason
+
+    def end_frame(self):
+        if not self.enabled or not self.staged:
+            return
+
+        keep = self.sampled or (self.on_anomaly and self.anomaly is not None)
+        if keep:
+            prefix = f"{self.frame_index:06d}_{'anomaly' if self.anomaly else 'sample'}"
+            with self.condition:
+                for name, image in self.staged:
+                    if len(self.pending) == self.pending.maxlen:
+                        self.dropped += 1
+                    # Copy, the frame buffer may be reused before the writer gets to it
+                    self.pending.append((f"{prefix}_{name}.png", image.copy()))
+                self.condition.notify()
+            self.start()
+
+        self.staged = []
+
+    def start(self):
+        if self.worker is not None:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        self.running = True
+        self.worker = threading.Thread(target=self.write_loop, name="debug-sink", daemon=True)
+        self.worker.start()
+
+    def write_loop(self):
+        while True:
+            with self.condition:
+                while self.running and not self.pending:
+                    self.condition.wait()
+                if not self.pending:
+                    return
+                filename, image = self.pending.popleft()
+
+            # PNG encoding and disk I/O happen here, off the frame path
+            cv2.imwrite(os.path.join(self.directory, filename), image)
+            self.written += 1
+
+    def close(self):
+        # Flush whatever is still queued and stop the writer
+        if self.worker is None:
+            return
+        with self.condition:
+            self.running = False
+            self.condition.notify()
+        self.worker.join()
+        self.worker = None
\ No newline at end of file
@@ -0,0 +1,243 @@
+import ast
+import os
+import time
+import cv2
+import numpy as np
+
+def class_to_roi_key(class_name):
+    # Map a detector class name to the ROI key used by Bot
+    if class_name == 'REFERENSI':
+        return 'reference'
+    elif class_name == 'SOAL':
+        return 'question'
+    elif class_name in ['A', 'B', 'C', 'D', 'E']:
+        return f'option_{class_name.lower()}'
+    return None
+
+def letterbox(image, size):
+    # Resize keeping aspect ratio and pad to a fixed size x size square
+    height, width = image.shape[:2]
+    scale = min(size / width, size / height)
+    new_w, new_h = int(round(width * scale)), int(round(height * scale))
+    pad_x, pad_y = (size - new_w) // 2, (size - new_h) // 2
+
+    canvas = np.full((size, size, 3), 114, dtype=np.uint8)
+    canvas[pad_y:pad_y+new_h, pad_x:pad_x+new_w] = cv2.resize(
+        image, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+    return canvas, scale, (pad_x, pad_y)
+
+def to_input_tensor(image):
+    # HWC BGR uint8 -> NCHW RGB float32 in [0, 1]
+    rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+    return np.ascontiguousarray(rgb.transpose(2, 0, 1)[None], dtype=np.float32) / 255.0
+
+def decode_predictions(output, names, scale, pad, conf, image_size):
+    # Raw YOLOv8 export output (1, 4 + classes, N): cx, cy, w, h, class scores.
+    # Each ROI class appears once on screen, so keep the best box per class.
+    predictions = np.squeeze(output, axis=0).T
+    scores = predictions[:, 4:]
+    class_ids = np.argmax(scores, axis=1)
+    confidences = scores[np.arange(len(scores)), class_ids]
+
+    roi = {}
+    best = {}
+    width, height = image_size
+    pad_x, pad_y = pad
+    for i in np.flatnonzero(confidences >= conf):
+        key = class_to_roi_key(names.get(int(class_ids[i])))
+        if key is None or confidences[i] <= best.get(key, 0):
+            continue
+        cx, cy, w, h = predictions[i, :4]
+        # Undo the letterbox to get native screen coordinates
+        x1 = int(np.clip((cx - w / 2 - pad_x) / scale, 0, width))
+        y1 = int(np.clip((cy - h / 2 - pad_y) / scale, 0, height))
+        x2 = int(np.clip((cx + w / 2 - pad_x) / scale, 0, width))
+        y2 = int(np.clip((cy + h / 2 - pad_y) / scale, 0, height))
+        roi[key] = (x1, y1, x2, y2)
+        best[key] = confidences[i]
+    return roi
+
+def scale_roi(roi, scale, size):
+    # Map boxes found on a downscaled frame back to native screen coordinates.
+    # Boxes are rounded outwards so crops never lose border pixels.
+    sx, sy = scale
+    width, height = size
+    return {key: (int(np.clip(np.floor(x1 * sx), 0, width)), int(np.clip(np.floor(y1 * sy), 0, height)),
+                  int(np.clip(np.ceil(x2 * sx), 0, width)), int(np.clip(np.ceil(y2 * sy), 0, height)))
+            for key, (x1, y1, x2, y2) in roi.items()}
+
+def warm_up(detector, runs, size):
+    # Run a few dummy inferences so the first real frame doesn't pay for lazy init
+    if runs <= 0:
+        return
+    start = time.time()
+    dummy = np.full((size, size, 3), 114, dtype=np.uint8)
+    for _ in range(runs):
+        detector.detect(dummy)
+    print(f"Detector warm-up: {runs} runs in {(time.time() - start)*1000:.0f}ms")
+
+class YoloDetector:
+    def __init__(self, model_path, conf=0.8, imgsz=None, threads=None, warmup=0):
+        # Import here so modules that don't need YOLO don't pull in ultralytics/torch
+        from ultralytics import YOLO
+
+        if threads:
+            import torch
+            torch.set_num_threads(threads)
+
+        self.model = YOLO(model_path)
+        self.conf = conf
+        # None = use the screen width, like before
+        self.imgsz = imgsz
+        warm_up(self, warmup, imgsz or 640)
+
+    def detect(self, screenshot):
+        width = screenshot.shape[1]
+
+        # Run inference with YOLO using dynamic image size
+        results = self.model(
+            screenshot,
+            conf=self.conf,               # Confidence threshold
+            imgsz=self.imgsz or width,    # Use screen width to maintain aspect ratio
+        )
+
+        roi = {}
+        for result in results:
+            roi.update(self.result_to_roi(result))
+        return roi
+
+    def detect_batch(self, screenshots):
+        # One model call for several frames; ultralytics batches a list of images
+        width = max(screenshot.shape[1] for screenshot in screenshots)
+        results = self.model(list(screenshots), conf=self.conf, imgsz=self.imgsz or width)
+        return [self.result_to_roi(result) for result in results]
+
+    def result_to_roi(self, result):
+        roi = {}
+
+        # Process detection results
+        boxes = result.boxes  # Bounding boxes
+        for box in boxes:
+            # Get box coordinates
+            x1, y1, x2, y2 = box.xyxy[0].cpu().numpy().astype(int)
+
+            # Get class id and convert to class name
+            class_id = int(box.cls[0].item())
+            key = class_to_roi_key(result.names[class_id])
+
+            # Map class to ROI
+            if key is not None:
+                roi[key] = (x1, y1, x2, y2)
+
+        return roi
+
+class OnnxDetector:
+    def __init__(self, model_path, imgsz=640, conf=0.8, threads=None, warmup=2):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(model_path, options, providers=['CPUExecutionProvider'])
+        self.input_name = self.session.get_inputs()[0].name
+        self.imgsz = imgsz
+        self.conf = conf
+
+        # ultralytics stores the class names in the ONNX metadata
+        metadata = self.session.get_modelmeta().custom_metadata_map
+        self.names = ast.literal_eval(metadata['names'])
+        warm_up(self, warmup, imgsz)
+
+    def detect(self, screenshot):
+        image, scale, pad = letterbox(screenshot, self.imgsz)
+        output = self.session.run(None, {self.input_name: to_input_tensor(image)})[0]
+        height, width = screenshot.shape[:2]
+        return decode_predictions(output, self.names, scale, pad, self.conf, (width, height))
+
+class OpenVinoDetector:
+    def __init__(self, model_dir, imgsz=640, conf=0.8, threads=None, warmup=2):
+        import openvino as ov
+        import yaml
+
+        # model_dir is the <name>_openvino_model folder written by ultralytics export
+        xml_path = [n for n in os.listdir(model_dir) if n.endswith('.xml')][0]
+        config = {'INFERENCE_NUM_THREADS': threads} if threads else {}
+        core = ov.Core()
+        self.model = core.compile_model(os.path.join(model_dir, xml_path), 'CPU', config)
+        self.imgsz = imgsz
+        self.conf = conf
+
+        with open(os.path.join(model_dir, 'metadata.yaml')) as f:
+            self.names = yaml.safe_load(f)['names']
+        warm_up(self, warmup, imgsz)
+
+    def detect(self, screenshot):
+        image, scale, pad = letterbox(screenshot, self.imgsz)
+        output = self.model(to_input_tensor(image))[self.model.output(0)]
+        height, width = screenshot.shape[:2]
+        return decode_predictions(output, self.names, scale, pad, self.conf, (width, height))
+
+BACKENDS = ('ultralytics', 'onnx', 'openvino', 'layout')
+
+def detect_batch(detector, screenshots):
+    # Detect several frames, in one call when the backend supports batching
+    if hasattr(detector, 'detect_batch'):
+        return detector.detect_batch(screenshots)
+    return [detector.detect(screenshot) for screenshot in screenshots]
+
+def exported_path(model_path, backend):
+    base = os.path.splitext(model_path)[0]
+    if backend == 'onnx':
+        return base + '.onnx'
+    if backend == 'openvino':
+        return base + '_openvino_model'
+    return model_path
+
+def layout_path(model_path):
+    # Calibrated layout lives next to the model weights
+    return os.path.join(os.path.dirname(model_path), 'layout.json')
+
+def export_model(model_path, backend, imgsz=640):
+    # One-time export of the .pt weights; later runs reuse the exported file
+    from ultralytics import YOLO
+
+    print(f"Exporting {model_path} to {backend} (imgsz={imgsz})...")
+    YOLO(model_path).export(format=backend, imgsz=imgsz)
+    return exported_path(model_path, backend)
+
+def create_detector(backend, model_path, imgsz=640, conf=0.8, threads=None, warmup=2, isolated=False,
+                    timeout=None):
+    if isolated:
+        # Same backend, run in a supervised worker process fed through shared memory.
+        # timeout: seconds per detection before the worker is restarted (None = adaptive)
+        from .detector_process import ProcessDetector
+        return ProcessDetector(backend, model_path, timeout=timeout,
+                               imgsz=imgsz, conf=conf, threads=threads, warmup=warmup)
+    if backend == 'ultralytics':
+        return YoloDetector(model_path, conf=conf, threads=threads, warmup=warmup)
+    if backend == 'layout':
+        # Detector-free mode; needs a layout saved by calibrate.py
+        from .layout import TemplateLayoutDetector
+        return TemplateLayoutDetector(layout_path(model_path))
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown detector backend: {backend}")
+
+    path = exported_path(model_path, backend)
+    if not os.path.exists(path):
+        path = export_model(model_path, backend, imgsz)
+
+    if backend == 'onnx':
+        return OnnxDetector(path, imgsz=imgsz, conf=conf, threads=threads, warmup=warmup)
+    return OpenVinoDetector(path, imgsz=imgsz, conf=conf, threads=threads, warmup=warmup)
+
+class GroundTruthDetector:
+    # Labels are in native coordinates of the source frame, so never feed it a downscaled one
+    accepts_downscaled = False
+
+    def __init__(self, source):
+        # Returns the ROIs stored in the sidecar labels of the source's current frame
+        self.source = source
+
+    def detect(self, screenshot):
+        labels = self.source.current_labels or {}
+        return {key: tuple(int(v) for v in box) for key, box in labels.get('roi', {}).items()}
\ No newline at end of file
@@ -0,0 +1,181 @@
+import multiprocessing
+import queue
+import time
+from multiprocessing import shared_memory
+import numpy as np
+
+def attach(names):
+    # Open the parent's shared-memory slots. The spawned worker shares the parent's
+    # resource tracker, and only the parent unlinks them.
+    return [shared_memory.SharedMemory(name=name) for name in names]
+
+def detector_worker(backend, model_path, options, requests, results):
+    # Runs in the worker process: load the model once, then serve frames from shared memory
+    from .detector import create_detector
+    try:
+        detector = create_detector(backend, model_path, **options)
+    except Exception as e:
+        results.put(('failed', None, str(e)))
+        return
+    results.put(('ready', None, None))
+
+    ring_names, blocks = None, []
+    while True:
+        request = requests.get()
+        if request is None:
+            break
+        request_id, names, slot, shape = request
+
+        # The parent reallocates the ring when the frame size grows
+        if names != ring_names:
+            for block in blocks:
+                block.close()
+            blocks, ring_names = attach(names), names
+
+        frame = np.ndarray(shape, dtype=np.uint8, buffer=blocks[slot].buf)
+        try:
+            roi = detector.detect(frame)
+            # Plain ints only, so the reply stays a tiny pickle
+            roi = {key: tuple(int(v) for v in box) for key, box in roi.items()}
+            results.put((request_id, roi, None))
+        except Exception as e:
+            results.put((request_id, None, str(e)))
+        del frame
+
+    for block in blocks:
+        block.close()
+
+class ProcessDetector:
+    def __init__(self, backend, model_path, slots=2, timeout=None, startup_timeout=120.0, **options):
+        # Runs another detector (any create_detector backend) in a persistent worker process.
+        # Frames go through a ring of shared-memory slots, only ROIs come back over a queue.
+        self.backend = backend
+        self.model_path = model_path
+        self.options = options
+        self.slot_count = slots
+        # Seconds to wait for one detection / for the worker to load its model.
+        # timeout=None adapts to the measured detection time, see detect_timeout()
+        self.timeout = timeout
+        self.startup_timeout = startup_timeout
+        self.min_timeout = 5.0
+        self.slowest = None
+
+        # spawn: a fresh interpreter, never a fork of a process that runs Qt and threads
+        self.context = multiprocessing.get_context('spawn')
+        self.process = None
+        self.requests = None
+        self.results = None
+        self.blocks = []
+        self.ring_names = ()
+        self.slot = 0
+        self.request_id = 0
+        self.restarts = 0
+
+        self.start()
+
+    def start(self):
+        self.requests = self.context.Queue()
+        self.results = self.context.Queue()
+        self.process = self.context.Process(
+            target=detector_worker, name="detector",
+            args=(self.backend, self.model_path, self.options, self.requests, self.results),
+            daemon=True)
+        self.process.start()
+
+        # Wait until the model is loaded so load errors surface here, like in-process
+        deadline = time.time() + self.startup_timeout
+        while True:
+            try:
+                status, _, error = self.results.get(timeout=0.1)
+            except queue.Empty:
+                if not self.process.is_alive() or time.time() > deadline:
+                    self.kill()
+                    raise RuntimeError("Detector worker did not start")
+                continue
+            if status == 'failed':
+                self.kill()
+                raise RuntimeError(f"Detector worker failed to load the model: {error}")
+            break
+        print(f"Detector worker started (pid {self.process.pid}, {self.backend})")
+
+    def kill(self):
+        if self.process is not None and self.process.is_alive():
+            self.process.kill()
+        if self.process is not None:
+            self.process.join(timeout=1.0)
+        self.process = None
+
+    def restart(self, reason):
+        # Supervisor: replace a crashed or hung worker, the caller just loses this frame
+        self.restarts += 1
+        print(f"Detector worker {reason}, restarting (restart #{self.restarts})")
+        self.kill()
+        self.start()
+
+    def allocate(self, nbytes):
+        # (Re)create the ring when a frame doesn't fit the current slots
+        self.free_blocks()
+        self.blocks = [shared_memory.SharedMemory(create=True, size=nbytes) for _ in range(self.slot_count)]
+        self.ring_names = tuple(block.name for block in self.blocks)
+
+    def free_blocks(self):
+        for block in self.blocks:
+            block.close()
+            block.unlink()
+        self.blocks = []
+        self.ring_names = ()
+
+    def detect_timeout(self):
+        if self.timeout is not None:
+            return self.timeout
+        # The first frame may pay for lazy init at the real frame size; after that allow
+        # 10x the slowest detection seen, so slow CPUs and big monitors don't loop on restarts
+        if self.slowest is None:
+            return self.startup_timeout
+        return max(self.min_timeout, 10 * self.slowest)
+    
+    def detect(self, screenshot):
+        if self.process is None or not self.process.is_alive():
+            self.restart("exited")
+
+        frame = np.ascontiguousarray(screenshot, dtype=np.uint8)
+        if not self.blocks or frame.nbytes > self.blocks[0].size:
+            self.allocate(frame.nbytes)
+
+        # Next slot of the ring; a slot left behind by a timed-out request isn't reused right away
+        self.slot = (self.slot + 1) % self.slot_count
+        target = np.ndarray(frame.shape, dtype=np.uint8, buffer=self.blocks[self.slot].buf)
+        target[...] = frame
+        del target
+
+        self.request_id += 1
+        self.requests.put((self.request_id, self.ring_names, self.slot, frame.shape))
+
+        start = time.time()
+        deadline = start + self.detect_timeout()
+        while True:
+            try:
+                request_id, roi, error = self.results.get(timeout=0.1)
+            except queue.Empty:
+                if not self.process.is_alive():
+                    self.restart("crashed")
+                    raise RuntimeError("Detector worker crashed during detection")
+                if time.time() > deadline:
+                    self.restart("timed out")
+                    raise RuntimeError("Detector worker timed out")
+                continue
+            # Replies to earlier, abandoned requests are dropped
+            if request_id != self.request_id:
+                continue
+            if error is not None:
+                raise RuntimeError(f"Detector worker error: {error}")
+            elapsed = time.time() - start
+            self.slowest = elapsed if self.slowest is None else max(self.slowest, elapsed)
+            return roi
+
+    def close(self):
+        if self.process is not None and self.process.is_alive():
+            self.requests.put(None)
+            self.process.join(timeout=2.0)
+        self.kill()
+        self.free_blocks()
\ No newline at end of file
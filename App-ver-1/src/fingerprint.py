@@ -0,0 +1,106 @@
+from functools import lru_cache
+import cv2
+import numpy as np
+
+# Fingerprints are plain Python ints holding hash_size x hash_size bits (one 64-bit word
+# for 8x8, four for 16x16); the Hamming distance is a popcount of their XOR.
+
+# Bits a region's 16x16 pHash may differ by and still count as unchanged. Identical
+# frames give 0; on synthetic panels replacing a single glyph flips at least 6 bits.
+# Kept low on purpose: a false change only costs a re-solve, a missed one a wrong answer.
+REGION_THRESHOLDS = {
+    'column': 5,
+    'question': 4,
+}
+
+# Kind of key the fingerprint caches are written with (16x16 pHash); cache files with
+# another key format are not loaded
+KEY_FORMAT = 'phash16'
+
+def to_gray(image):
+    return cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if len(image.shape) == 3 else image
+
+def pack_bits(bits):
+    """Pack a boolean array (row-major) into one integer, first bit most significant"""
+    return int.from_bytes(np.packbits(bits, axis=None).tobytes(), 'big')
+
+def hamming_distance(hash1, hash2):
+    """Number of differing bits between two integer hashes"""
+    return (hash1 ^ hash2).bit_count()
+
+@lru_cache(maxsize=8)
+def dct_matrix(size, rows):
+    # First `rows` rows of the orthonormal DCT-II matrix for `size` samples
+    k = np.arange(rows)[:, None]
+    x = np.arange(size)[None, :]
+    matrix = np.cos(np.pi * (2 * x + 1) * k / (2 * size)) * np.sqrt(2.0 / size)
+    matrix[0] /= np.sqrt(2.0)
+    return matrix
+
+def area_matrix(size, length):
+    # (size x length) matrix averaging `length` samples into `size` bins, like INTER_AREA
+    edges = np.arange(size + 1) * (length / size)
+    pixels = np.arange(length)[None, :]
+    overlap = np.minimum(edges[1:, None], pixels + 1) - np.maximum(edges[:-1, None], pixels)
+    return np.clip(overlap, 0, None) * (size / length)
+
+@lru_cache(maxsize=16)
+def phash_projections(shape, hash_size, highfreq_factor):
+    # DCT basis with the downscale to the pHash thumbnail folded in, so the low-frequency
+    # block is left @ image @ right without building the thumbnail. Cached per region size.
+    height, width = shape
+    size = hash_size * highfreq_factor
+    basis = dct_matrix(size, hash_size)
+    left = (basis @ area_matrix(size, height)).astype(np.float32)
+    right = (basis @ area_matrix(size, width)).T.astype(np.float32)
+    return left, right
+
+def median(values):
+    # np.median without the full sort
+    middle = len(values) // 2
+    if len(values) % 2:
+        return np.partition(values, middle)[middle]
+    return np.partition(values, [middle - 1, middle])[middle - 1:middle + 1].mean()
+
+def dhash(image, hash_size=8):
+    """Difference hash: sign of horizontal gradients on a (hash_size+1) x hash_size thumbnail"""
+    small = cv2.resize(to_gray(image), (hash_size + 1, hash_size), interpolation=cv2.INTER_AREA)
+    return pack_bits(small[:, 1:] > small[:, :-1])
+
+def phash(image, hash_size=8, highfreq_factor=4):
+    """Perceptual hash: low-frequency DCT coefficients of an area-averaged thumbnail above their median"""
+    gray = to_gray(image)
+    left, right = phash_projections(gray.shape, hash_size, highfreq_factor)
+    coefficients = np.matmul(left, gray, dtype=np.float32) @ right
+    # Median without the DC term, which only carries the mean brightness
+    return pack_bits(coefficients > median(coefficients.ravel()[1:]))
+
+class ChangeDetector:
+    def __init__(self, region, hash_size=16, threshold=None):
+        # Remembers the fingerprint of one screen region and tells when it has changed
+        self.region = region
+        self.hash_size = hash_size
+        self.threshold = REGION_THRESHOLDS[region] if threshold is None else threshold
+
+        self.fingerprint = None
+        self.current = None
+        self.distance = None
+
+    def reset(self):
+        self.fingerprint = None
+        self.current = None
+        self.distance = None
+
+    def check(self, image):
+        # True if image differs from the accepted fingerprint (or there is none yet).
+        # The new fingerprint is kept in self.current until accept() is called.
+        self.current = phash(image, self.hash_size)
+        if self.fingerprint is None:
+            self.distance = None
+            return True
+        self.distance = hamming_distance(self.fingerprint, self.current)
+        return self.distance > self.threshold
+
+    def accept(self):
+        # The last checked image becomes the new reference state
+        self.fingerprint = self.current
\ No newline at end of file
@@ -0,0 +1,44 @@
+from collections import OrderedDict
+
+class FingerprintCache:
+    def __init__(self, capacity, path=None):
+        # LRU of values keyed by pHash fingerprints, with the hit/miss accounting shared by
+        # ReferenceCache and AnswerCache; they only differ in key shape and file format
+        self.capacity = capacity
+        # Optional file used to keep the cache across runs (format is up to the subclass)
+        self.path = path
+        self.entries = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, key, distance):
+        # Exact hit first, then the nearest cached key. distance(cached_key) returns how
+        # far a key is, or None if it is too far to count as the same screen.
+        match = key if key in self.entries else None
+        if match is None:
+            best_distance = None
+            for cached_key in self.entries:
+                d = distance(cached_key)
+                if d is not None and (best_distance is None or d < best_distance):
+                    match, best_distance = cached_key, d
+
+        if match is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self.entries.move_to_end(match)
+        return self.entries[match]
+
+    def store(self, key, value):
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+
+    def hit_rate(self):
+        total = self.hits + self.misses
+        if total == 0:
+            return 0.0
+        return self.hits / total
\ No newline at end of file
@@ -0,0 +1,102 @@
+import json
+import os
+import cv2
+import numpy as np
+
+# Boxes whose content never changes make good anchors (the A-E option labels)
+ANCHOR_KEYS = ('option_a', 'option_b', 'option_c', 'option_d', 'option_e')
+
+def anchors_path(layout_path):
+    return os.path.splitext(layout_path)[0] + "_anchors.npz"
+
+def save_layout(path, screenshot, roi):
+    # Save the detected layout as coordinates relative to the frame plus anchor templates
+    height, width = screenshot.shape[:2]
+    gray = cv2.cvtColor(screenshot, cv2.COLOR_BGR2GRAY) if len(screenshot.shape) == 3 else screenshot
+
+    layout = {
+        'width': width,
+        'height': height,
+        'boxes': {key: [x1 / width, y1 / height, x2 / width, y2 / height]
+                  for key, (x1, y1, x2, y2) in roi.items()},
+        'anchors': [key for key in ANCHOR_KEYS if key in roi],
+    }
+    if not layout['anchors']:
+        raise ValueError("No option boxes detected, cannot calibrate anchors")
+
+    templates = {}
+    for key in layout['anchors']:
+        x1, y1, x2, y2 = (int(v) for v in roi[key])
+        templates[key] = gray[y1:y2, x1:x2].copy()
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(layout, f, indent=2)
+    np.savez_compressed(anchors_path(path), **templates)
+    print(f"Layout saved to {path} with anchors {layout['anchors']}")
+
+class TemplateLayoutDetector:
+    def __init__(self, path, downscale=0.5, scale_range=0.2, scale_steps=5, min_score=0.7):
+        # Finds the calibrated layout again with multi-scale template matching,
+        # without loading ultralytics/torch
+        with open(path) as f:
+            self.layout = json.load(f)
+        anchors = np.load(anchors_path(path))
+        self.templates = {key: anchors[key] for key in self.layout['anchors']}
+
+        # Matching runs on a frame downscaled by this factor
+        self.downscale = downscale
+        # Relative window scales searched around the expected scale
+        self.scale_factors = np.linspace(1 - scale_range, 1 + scale_range, scale_steps)
+        self.min_score = min_score
+
+    def match(self, small, template, scale):
+        # Best TM_CCOEFF_NORMED match of the template resized by scale
+        size = (int(round(template.shape[1] * scale)), int(round(template.shape[0] * scale)))
+        if size[0] < 4 or size[1] < 4 or size[0] > small.shape[1] or size[1] > small.shape[0]:
+            return -1.0, None
+        resized = cv2.resize(template, size, interpolation=cv2.INTER_AREA)
+        result = cv2.matchTemplate(small, resized, cv2.TM_CCOEFF_NORMED)
+        _, score, _, location = cv2.minMaxLoc(result)
+        return score, location
+
+    def detect(self, screenshot):
+        height, width = screenshot.shape[:2]
+        gray = cv2.cvtColor(screenshot, cv2.COLOR_BGR2GRAY) if len(screenshot.shape) == 3 else screenshot
+        small = cv2.resize(gray, None, fx=self.downscale, fy=self.downscale, interpolation=cv2.INTER_AREA)
+
+        calib_w, calib_h = self.layout['width'], self.layout['height']
+        expected = width / calib_w
+
+        # Search the scale with the first anchor only, then reuse it for the others
+        keys = self.layout['anchors']
+        best_score, best_scale = -1.0, expected
+        for factor in self.scale_factors:
+            score, _ = self.match(small, self.templates[keys[0]], expected * factor * self.downscale)
+            if score > best_score:
+                best_score, best_scale = score, expected * factor
+
+        # Offsets (in native pixels) of every anchor that matches well enough
+        offsets = []
+        for key in keys:
+            score, location = self.match(small, self.templates[key], best_scale * self.downscale)
+            if location is None or score < self.min_score:
+                continue
+            rx1, ry1 = self.layout['boxes'][key][:2]
+            offsets.append((location[0] / self.downscale - best_scale * rx1 * calib_w,
+                            location[1] / self.downscale - best_scale * ry1 * calib_h))
+
+        if not offsets:
+            return {}
+
+        tx, ty = np.median(np.array(offsets), axis=0)
+        roi = {}
+        for key, (rx1, ry1, rx2, ry2) in self.layout['boxes'].items():
+            x1 = int(np.clip(best_scale * rx1 * calib_w + tx, 0, width))
+            y1 = int(np.clip(best_scale * ry1 * calib_h + ty, 0, height))
+            x2 = int(np.clip(best_scale * rx2 * calib_w + tx, 0, width))
+            y2 = int(np.clip(best_scale * ry2 * calib_h + ty, 0, height))
+            roi[key] = (x1, y1, x2, y2)
+        return roi
\ No newline at end of file
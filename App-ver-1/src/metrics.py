@@ -0,0 +1,104 @@
+import csv
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+import numpy as np
+
+class Metrics:
+    STAGES = ('capture', 'yolo', 'reference', 'question', 'matching', 'overlay', 'total')
+    COUNTERS = ('frames', 'answers', 'skips', 'no_roi', 'errors')
+
+    def __init__(self, window=1000):
+        # Rolling window of the last `window` samples per stage (seconds)
+        self.samples = {stage: deque(maxlen=window) for stage in self.STAGES}
+        self.counters = {name: 0 for name in self.COUNTERS}
+        self.lock = threading.Lock()
+        self.started_at = time.time()
+
+    @contextmanager
+    def time(self, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - start)
+
+    def record(self, stage, seconds):
+        with self.lock:
+            self.samples[stage].append(seconds)
+
+    def count(self, name, amount=1):
+        with self.lock:
+            self.counters[name] += amount
+
+    def percentiles(self, stage):
+        with self.lock:
+            values = np.array(self.samples[stage])
+        if len(values) == 0:
+            return None
+        p50, p95, p99 = np.percentile(values, [50, 95, 99]) * 1000
+        return {'count': len(values), 'p50_ms': p50, 'p95_ms': p95, 'p99_ms': p99}
+
+    def snapshot(self):
+        with self.lock:
+            counters = dict(self.counters)
+        return {
+            'time': time.time(),
+            'uptime_s': time.time() - self.started_at,
+            'counters': counters,
+            'stages': {stage: self.percentiles(stage) for stage in self.STAGES},
+        }
+
+    def format_table(self):
+        # Multi-line summary for the stats panel in MainWindow
+        snapshot = self.snapshot()
+        lines = [" ".join(f"{name}={value}" for name, value in snapshot['counters'].items())]
+        for stage, stats in snapshot['stages'].items():
+            if stats is None:
+                continue
+            lines.append(f"{stage:<10} p50 {stats['p50_ms']:7.1f}  p95 {stats['p95_ms']:7.1f}  "
+                         f"p99 {stats['p99_ms']:7.1f} ms  (n={stats['count']})")
+        return "\n".join(lines)
+
+class StatsWriter:
+    def __init__(self, metrics, path, interval=10.0):
+        # Periodically dump metrics snapshots; .csv appends one row per stage,
+        # anything else appends one JSON object per line
+        self.metrics = metrics
+        self.path = path
+        self.interval = interval
+        self.last_write = time.time()
+
+    def maybe_write(self):
+        if time.time() - self.last_write < self.interval:
+            return
+        self.write()
+
+    def write(self):
+        self.last_write = time.time()
+        snapshot = self.metrics.snapshot()
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        if self.path.endswith('.csv'):
+            new_file = not os.path.exists(self.path)
+            with open(self.path, 'a', newline='') as f:
+                writer = csv.writer(f)
+                if new_file:
+                    writer.writerow(['time', 'stage', 'count', 'p50_ms', 'p95_ms', 'p99_ms']
+                                    + list(Metrics.COUNTERS))
+                counters = [snapshot['counters'][name] for name in Metrics.COUNTERS]
+                for stage, stats in snapshot['stages'].items():
+                    if stats is None:
+                        continue
+                    writer.writerow([f"{snapshot['time']:.3f}", stage, stats['count'],
+                                     f"{stats['p50_ms']:.3f}", f"{stats['p95_ms']:.3f}",
+                                     f"{stats['p99_ms']:.3f}"] + counters)
+        else:
+            with open(self.path, 'a') as f:
+                f.write(json.dumps(snapshot) + "\n")
\ No newline at end of file
@@ -1,18 +1,24 @@
 import sys
+import time
 import random
 from PyQt5.QtWidgets import QWidget, QApplication
-from PyQt5.QtCore import Qt, QTimer
+from PyQt5.QtCore import Qt, QTimer, QRect
 from PyQt5.QtGui import QPainter, QPen, QColor
 
 class OverlayWindow(QWidget):
-    def __init__(self):
+    def __init__(self, hold_ms=500):
         super().__init__()
-        self.init_ui()
-        self.highlighted_box = None
+        self.highlighted_boxes = []
+        # Highlight disappears hold_ms after the last frame that showed it
+        self.hold_ms = hold_ms
+        self.expires_at = 0.0
+        self.pen_width = 3
         self.highlight_timer = QTimer()
-        self.highlight_timer.timeout.connect(self.clear_highlight)
+        self.highlight_timer.setSingleShot(True)
+        self.highlight_timer.timeout.connect(self.check_expired)
         # Warna awal
         self.current_color = QColor(0, 255, 0)  # Hijau sebagai default
+        self.init_ui()
         
     def init_ui(self):
         # Set window flags
@@ -50,28 +56,57 @@ class OverlayWindow(QWidget):
             if r + g + b < 600:
                 return QColor(r, g, b)
     
+    @property
+    def highlighted_box(self):
+        return self.highlighted_boxes[0] if self.highlighted_boxes else None
+    
+    def box_rect(self, box):
+        # Widget area covered by a box outline, including the pen width
+        x1, y1, x2, y2 = box
+        margin = self.pen_width
+        return QRect(int(x1) - margin, int(y1) - margin,
+                     int(x2 - x1) + 2 * margin + 1, int(y2 - y1) + 2 * margin + 1)
+    
     def highlight_answer(self, box_coords):
-        # Set the box to highlight
-        self.highlighted_box = box_coords
+        self.highlight_boxes([box_coords])
+    
+    def highlight_boxes(self, boxes):
+        # Must run on the GUI thread; worker threads go through a queued signal
+        boxes = [tuple(box) for box in boxes]
+        self.expires_at = time.monotonic() + self.hold_ms / 1000.0
+        
+        # Same boxes as on screen: only keep them alive, nothing to repaint
+        if boxes == self.highlighted_boxes:
+            return
         
         # Generate new random color for this prediction
         self.current_color = self.generate_random_color()
         
-        # Repaint the widget
-        self.repaint()
+        # Repaint only the old and the new rectangles
+        for box in self.highlighted_boxes + boxes:
+            self.update(self.box_rect(box))
+        self.highlighted_boxes = boxes
         
-        # Set timer to clear highlight after 500ms
-        self.highlight_timer.start(500)
+        # Timer runs once per change, not once per frame
+        if not self.highlight_timer.isActive():
+            self.highlight_timer.start(self.hold_ms)
+    
+    def check_expired(self):
+        remaining = self.expires_at - time.monotonic()
+        if remaining > 0:
+            # Re-highlighted since the timer was started, wait for the rest
+            self.highlight_timer.start(int(remaining * 1000) + 1)
+        else:
+            self.clear_highlight()
     
     def clear_highlight(self):
-        # Clear the highlighted box
-        self.highlighted_box = None
-        
-        # Repaint the widget
-        self.repaint()
+        # Clear the highlighted boxes
+        for box in self.highlighted_boxes:
+            self.update(self.box_rect(box))
+        self.highlighted_boxes = []
         
     def paintEvent(self, event):
-        if not self.highlighted_box:
+        if not self.highlighted_boxes:
             return
             
         # Create painter
@@ -79,12 +114,12 @@ class OverlayWindow(QWidget):
         
         # Set pen properties
         pen = QPen(self.current_color)  # Gunakan warna saat ini
-        pen.setWidth(3)
+        pen.setWidth(self.pen_width)
         painter.setPen(pen)
         
-        # Draw rectangle around the answer
-        x1, y1, x2, y2 = self.highlighted_box
-        painter.drawRect(x1, y1, x2-x1, y2-y1)
+        # Draw rectangle around every highlighted box
+        for x1, y1, x2, y2 in self.highlighted_boxes:
+            painter.drawRect(x1, y1, x2-x1, y2-y1)
         
     def close(self):
         # Stop timer if running
@@ -0,0 +1,166 @@
+import threading
+import time
+from collections import deque
+from .scheduler import FrameScheduler
+
+class StageQueue:
+    def __init__(self, name, maxsize=1):
+        # Bounded queue between two stages; when full the oldest (stale) frame is dropped
+        self.name = name
+        self.maxsize = maxsize
+        self.items = deque()
+        self.condition = threading.Condition()
+
+        # Queue-depth statistics
+        self.put_count = 0
+        self.dropped = 0
+        self.depth_total = 0
+        self.max_depth = 0
+
+    def put(self, item):
+        with self.condition:
+            if len(self.items) >= self.maxsize:
+                self.items.popleft()
+                self.dropped += 1
+            self.items.append(item)
+
+            self.put_count += 1
+            self.depth_total += len(self.items)
+            self.max_depth = max(self.max_depth, len(self.items))
+            self.condition.notify()
+
+    def get(self, timeout=0.1):
+        with self.condition:
+            if not self.items:
+                self.condition.wait(timeout)
+            if not self.items:
+                return None
+            return self.items.popleft()
+
+    def clear(self):
+        with self.condition:
+            self.items.clear()
+
+    def stats(self):
+        with self.condition:
+            return {
+                'depth': len(self.items),
+                'avg_depth': self.depth_total / self.put_count if self.put_count else 0.0,
+                'max_depth': self.max_depth,
+                'frames': self.put_count,
+                'dropped': self.dropped,
+            }
+
+class Pipeline:
+    def __init__(self, bot, queue_size=1, scheduler=None, on_error=None):
+        # capture -> detect -> solve, each on its own thread. The overlay stage is
+        # the bot's overlay, which forwards highlights to the GUI thread via Qt signals.
+        self.bot = bot
+        # Paces the capture stage; backs off while nothing changes on screen
+        self.scheduler = scheduler if scheduler is not None else FrameScheduler()
+        self.on_error = on_error
+
+        self.detect_queue = StageQueue('detect', queue_size)
+        self.solve_queue = StageQueue('solve', queue_size)
+
+        # Captured frames live in a reused ring buffer, which must outlast every frame
+        # in flight: one per queue slot plus one in each stage thread
+        in_flight = 2 * queue_size + 3
+        capture = bot.screen_capture
+        if hasattr(capture, 'buffer_count') and capture.buffer_count <= in_flight:
+            capture.buffer_count = in_flight + 1
+
+        self.threads = []
+        self.running = False
+        self.errors = 0
+
+    def start(self):
+        self.running = True
+        self.threads = [
+            threading.Thread(target=self.capture_loop, name="capture", daemon=True),
+            threading.Thread(target=self.stage_loop, name="detect", daemon=True,
+                             args=(self.detect_queue, self.detect, self.solve_queue)),
+            threading.Thread(target=self.stage_loop, name="solve", daemon=True,
+                             args=(self.solve_queue, self.solve_and_present, None)),
+        ]
+        for thread in self.threads:
+            thread.start()
+
+    def stop(self):
+        self.running = False
+        for thread in self.threads:
+            thread.join()
+        self.threads = []
+        self.detect_queue.clear()
+        self.solve_queue.clear()
+
+    def report_error(self, stage, error):
+        self.errors += 1
+        self.scheduler.frame_failed()
+        self.bot.metrics.count('errors')
+        print(f"Error in {stage} stage: {str(error)}")
+        if self.on_error:
+            self.on_error(f"Error in {stage}: {str(error)}")
+
+    def capture_loop(self):
+        try:
+            while self.running:
+                start = time.perf_counter()
+                try:
+                    self.detect_queue.put(self.bot.capture_stage())
+                except Exception as e:
+                    self.report_error("capture", e)
+
+                # Sleep for whatever is left of the frame budget (longer when idle or failing)
+                time.sleep(self.scheduler.delay(time.perf_counter() - start))
+        finally:
+            # Every Start runs a new capture thread; release the screen handle it opened
+            capture = self.bot.screen_capture
+            if hasattr(capture, 'close_thread'):
+                capture.close_thread()
+
+    def stage_loop(self, in_queue, func, out_queue):
+        stage = threading.current_thread().name
+        while self.running:
+            packet = in_queue.get()
+            if packet is None:
+                continue
+            try:
+                result = func(packet)
+            except Exception as e:
+                self.report_error(stage, e)
+                continue
+            if result is not None and out_queue is not None:
+                out_queue.put(result)
+
+    def detect(self, packet):
+        result = self.bot.detect_stage(packet)
+        if result is None:
+            # No test screen visible counts as an idle frame; a region frame dropped
+            # because the layout moved is marked changed and keeps the full rate
+            self.scheduler.frame_done(packet.get('changed', False))
+        return result
+
+    def solve_and_present(self, packet):
+        packet = self.bot.solve_stage(packet)
+        self.scheduler.frame_done(packet.get('changed', True))
+        self.bot.present_stage(packet)
+
+    def stats(self):
+        return {
+            'detect': self.detect_queue.stats(),
+            'solve': self.solve_queue.stats(),
+            'errors': self.errors,
+        }
+
+    def format_stats(self):
+        stats = self.stats()
+        parts = []
+        for name in ('detect', 'solve'):
+            q = stats[name]
+            parts.append(f"{name} q {q['depth']}/{q['max_depth']} "
+                         f"(avg {q['avg_depth']:.1f}, dropped {q['dropped']})")
+        parts.append(f"{self.scheduler.current_fps():.1f} fps")
+        if self.bot.first_answer_time is not None:
+            parts.append(f"first answer {self.bot.first_answer_time*1000:.0f}ms")
+        return " | ".join(parts)
\ No newline at end of file
@@ -0,0 +1,65 @@
+import os
+import numpy as np
+from .symbol import Symbol
+from .fingerprint import KEY_FORMAT, hamming_distance
+from .fingerprint_cache import FingerprintCache
+
+class ReferenceCache(FingerprintCache):
+    def __init__(self, capacity=64, max_distance=8, path=None):
+        # LRU cache of extracted reference symbols keyed by an integer pHash of the column.
+        # path: optional .npz file used to keep the cache across restarts
+        super().__init__(capacity, path)
+        # Hash yang berbeda <= max_distance bit dianggap kolom yang sama
+        self.max_distance = max_distance
+
+        if self.path and os.path.exists(self.path):
+            self.load()
+
+    def get(self, key):
+        def distance(cached_key):
+            d = hamming_distance(key, cached_key)
+            return d if d <= self.max_distance else None
+        return self.lookup(key, distance)
+
+    def put(self, key, symbols):
+        self.store(key, symbols)
+
+    def save(self):
+        if not self.path:
+            return
+
+        arrays = {'keys': np.array([f"{key:x}" for key in self.entries]), 'key_format': np.array(KEY_FORMAT)}
+        for key, symbols in self.entries.items():
+            prefix = f"{key:x}"
+            arrays[f"{prefix}_count"] = np.array(len(symbols))
+            for i, symbol in enumerate(symbols):
+                name = f"{prefix}_{i}"
+                arrays[f"{name}_image"] = symbol.image
+                arrays[f"{name}_contour"] = symbol.contour
+                arrays[f"{name}_position"] = np.array(symbol.position)
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        np.savez_compressed(self.path, **arrays)
+        print(f"Reference cache saved: {len(self.entries)} columns to {self.path}")
+
+    def load(self):
+        try:
+            data = np.load(self.path)
+            if 'key_format' not in data.files or str(data['key_format']) != KEY_FORMAT:
+                print(f"Reference cache {self.path} uses old keys, starting empty")
+                return
+            for prefix in data['keys']:
+                prefix = str(prefix)
+                symbols = []
+                for i in range(int(data[f"{prefix}_count"])):
+                    name = f"{prefix}_{i}"
+                    symbols.append(Symbol(data[f"{name}_image"], data[f"{name}_contour"],
+                                          tuple(int(v) for v in data[f"{name}_position"])))
+                self.put(int(prefix, 16), symbols)
+            print(f"Reference cache loaded: {len(self.entries)} columns from {self.path}")
+        except Exception as e:
+            # Cache rusak atau format lama; mulai dari kosong
+            print(f"Could not load reference cache: {str(e)}")
+            self.entries.clear()
\ No newline at end of file
@@ -0,0 +1,157 @@
+import json
+import os
+import time
+import cv2
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp')
+
+class NullOverlay:
+    # Headless stand-in for OverlayWindow; remembers the last highlighted box
+    def __init__(self):
+        self.highlighted_box = None
+
+    def highlight_answer(self, box_coords):
+        self.highlighted_box = box_coords
+
+    def highlight_boxes(self, boxes):
+        self.highlighted_box = boxes[0] if boxes else None
+
+    def close(self):
+        pass
+
+def load_labels(path):
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+class ReplaySource:
+    def __init__(self, path):
+        # Plays back a directory of screenshots or a video file in place of ScreenCapture.
+        # Labels: <image>.json next to each screenshot, or <video>.jsonl with one line per frame,
+        # e.g. {"answer": "C", "roi": {"reference": [x1, y1, x2, y2], "question": [...], ...}}
+        self.path = path
+        self.current_frame = None
+        self.current_labels = None
+        self.current_name = None
+        self.frame_count = 0
+
+        if os.path.isdir(path):
+            names = sorted(n for n in os.listdir(path) if n.lower().endswith(IMAGE_EXTENSIONS))
+            self.frames = self.image_frames([os.path.join(path, n) for n in names])
+        else:
+            self.frames = self.video_frames(path)
+
+        # Peek the first frame to know the "monitor" size
+        self.pending = next(self.frames, None)
+        if self.pending is None:
+            raise ValueError(f"No frames found in {path}")
+        height, width = self.pending[1].shape[:2]
+        self.monitor = {'left': 0, 'top': 0, 'width': width, 'height': height}
+
+    def image_frames(self, paths):
+        for image_path in paths:
+            frame = cv2.imread(image_path)
+            if frame is None:
+                print(f"Could not read {image_path}, skipping")
+                continue
+            labels = load_labels(os.path.splitext(image_path)[0] + ".json")
+            yield os.path.basename(image_path), frame, labels
+
+    def video_frames(self, video_path):
+        labels = []
+        label_path = os.path.splitext(video_path)[0] + ".jsonl"
+        if os.path.exists(label_path):
+            with open(label_path) as f:
+                labels = [json.loads(line) if line.strip() else None for line in f]
+
+        video = cv2.VideoCapture(video_path)
+        index = 0
+        try:
+            while True:
+                ok, frame = video.read()
+                if not ok:
+                    break
+                yield f"frame_{index:06d}", frame, labels[index] if index < len(labels) else None
+                index += 1
+        finally:
+            video.release()
+
+    def has_next(self):
+        return self.pending is not None
+
+    def next_frame(self):
+        if self.pending is None:
+            raise EOFError("Replay finished")
+        self.current_name, self.current_frame, self.current_labels = self.pending
+        self.pending = next(self.frames, None)
+        self.frame_count += 1
+        return self.current_frame
+
+    def capture(self):
+        return self.next_frame()
+
+    def union_box(self, regions, margin=0):
+        # Same contract as ScreenCapture.union_box
+        width, height = self.monitor['width'], self.monitor['height']
+        boxes = []
+        for x1, y1, x2, y2 in regions:
+            box = (max(0, x1 - margin), max(0, y1 - margin),
+                   min(width, x2 + margin), min(height, y2 + margin))
+            if box[2] > box[0] and box[3] > box[1]:
+                boxes.append(box)
+        if not boxes:
+            return None
+        return (min(b[0] for b in boxes), min(b[1] for b in boxes),
+                max(b[2] for b in boxes), max(b[3] for b in boxes))
+
+    def capture_frame(self, box=None, color=True, gray=True):
+        # Same contract as ScreenCapture.capture_frame, cropped from the next frame
+        frame = self.next_frame()
+        if box is not None:
+            x1, y1, x2, y2 = box
+            frame = frame[y1:y2, x1:x2]
+        gray_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if gray else None
+        return (frame if color else None), gray_frame
+
+def run_replay(bot, source, max_frames=None, alloc_report=None):
+    # Feed every frame of the source through the bot's stages and score the answers.
+    # alloc_report: optional AllocationReport, checked after every frame
+    results = []
+    start = time.perf_counter()
+
+    while source.has_next() and (max_frames is None or source.frame_count < max_frames):
+        answer = None
+        try:
+            packet = bot.detect_stage(bot.capture_stage())
+            if packet is not None:
+                packet = bot.solve_stage(packet)
+                bot.present_stage(packet)
+                answer = packet['answer']
+        except Exception as e:
+            bot.metrics.count('errors')
+            print(f"Error on {source.current_name}: {str(e)}")
+
+        expected = (source.current_labels or {}).get('answer')
+        results.append({'frame': source.current_name, 'answer': answer, 'expected': expected})
+        if alloc_report is not None:
+            alloc_report.maybe_report()
+
+    elapsed = time.perf_counter() - start
+    allocations = alloc_report.report() if alloc_report is not None else None
+    labelled = [r for r in results if r['expected'] is not None]
+    correct = sum(1 for r in labelled if r['answer'] == r['expected'])
+
+    return {
+        'frames': len(results),
+        'elapsed_s': elapsed,
+        'fps': len(results) / elapsed if elapsed > 0 else 0.0,
+        'labelled': len(labelled),
+        'correct': correct,
+        'accuracy': correct / len(labelled) if labelled else None,
+        'yolo_skip_rate': bot.roi_tracker.skip_rate(),
+        'first_answer_s': bot.first_answer_time,
+        'metrics': bot.metrics.snapshot(),
+        'allocations': allocations,
+        'results': results,
+    }
\ No newline at end of file
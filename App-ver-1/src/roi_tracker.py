@@ -0,0 +1,115 @@
+import time
+import cv2
+import numpy as np
+from .buffer_pool import BufferPool, copy_into
+
+class RoiTracker:
+    def __init__(self, max_age=5.0, border=4, diff_threshold=12.0, pool=None):
+        # Paksa YOLO jalan ulang setelah max_age detik walaupun layout terlihat sama
+        self.max_age = max_age
+        # Tebal strip tepi kotak yang dibandingkan (pixel)
+        self.border = border
+        # Rata-rata perbedaan intensitas maksimum agar layout dianggap tidak bergeser
+        self.diff_threshold = diff_threshold
+        # Strip, signature and difference buffers reused on every lookup
+        self.pool = pool if pool is not None else BufferPool()
+
+        self.roi = None
+        self.signature = None
+        self.detected_at = 0
+
+        # Counters for reporting the skip rate
+        self.yolo_runs = 0
+        self.yolo_skips = 0
+
+    def reset(self):
+        # Forget the cached layout (e.g. when the screen size changes)
+        self.roi = None
+        self.signature = None
+        self.detected_at = 0
+
+    def border_signature(self, screenshot, roi, origin=(0, 0)):
+        # Low-res fingerprint of the borders of every tracked box.
+        # origin is the screen position of screenshot[0, 0] for region grabs.
+        height, width = screenshot.shape[:2]
+        ox, oy = origin
+        b = self.border
+        # float32 supaya pengurangan tidak wrap-around seperti uint8
+        signature = self.pool.get('signature', (len(roi) * 4 * 32,), np.float32)
+        index = 0
+
+        for name in sorted(roi):
+            x1, y1, x2, y2 = roi[name]
+            x1, y1, x2, y2 = x1 - ox, y1 - oy, x2 - ox, y2 - oy
+            x1, y1 = max(0, x1), max(0, y1)
+            x2, y2 = min(width, x2), min(height, y2)
+            if x2 - x1 <= 2 * b or y2 - y1 <= 2 * b:
+                return None
+
+            for strip in (screenshot[y1:y1+b, x1:x2],     # top
+                          screenshot[y2-b:y2, x1:x2],     # bottom
+                          screenshot[y1:y2, x1:x1+b],     # left
+                          screenshot[y1:y2, x2-b:x2]):    # right
+                if len(strip.shape) == 3:
+                    strip = cv2.cvtColor(strip, cv2.COLOR_BGR2GRAY)
+                # Reduce each strip to 32 samples along its length
+                if strip.shape[1] >= strip.shape[0]:
+                    small = cv2.resize(strip, (32, 1), dst=self.pool.get('row', (1, 32)),
+                                       interpolation=cv2.INTER_AREA)
+                else:
+                    small = cv2.resize(strip, (1, 32), dst=self.pool.get('column', (32, 1)),
+                                       interpolation=cv2.INTER_AREA)
+                signature[index:index+32] = small.ravel()
+                index += 32
+
+        return signature
+
+    def is_fresh(self):
+        return (self.roi is not None and self.signature is not None
+                and time.time() - self.detected_at <= self.max_age)
+
+    def regions(self):
+        # Boxes worth grabbing while the cached layout is still trusted
+        if not self.is_fresh():
+            return None
+        return list(self.roi.values())
+
+    def lookup(self, screenshot, origin=(0, 0)):
+        # Return the cached ROI if the layout hasn't moved, otherwise None
+        if not self.is_fresh():
+            return None
+
+        signature = self.border_signature(screenshot, self.roi, origin)
+        if signature is None or signature.shape != self.signature.shape:
+            return None
+
+        difference = cv2.absdiff(signature, self.signature,
+                                 dst=self.pool.get('difference', signature.shape, np.float32))
+        diff = cv2.mean(difference)[0]
+        if diff > self.diff_threshold:
+            print(f"ROI layout moved, difference: {diff:.1f}")
+            return None
+
+        self.yolo_skips += 1
+        return self.roi
+
+    def update(self, screenshot, roi):
+        # Called after every YOLO run
+        self.yolo_runs += 1
+
+        # Hanya track layout yang lengkap (referensi dan soal terdeteksi)
+        if 'reference' not in roi or 'question' not in roi:
+            self.reset()
+            return
+
+        self.roi = roi
+        signature = self.border_signature(screenshot, roi)
+        # Kept across frames, so copied out of the pooled buffer
+        self.signature = None if signature is None else copy_into(self.signature, signature)
+        self.detected_at = time.time()
+
+    def skip_rate(self):
+        total = self.yolo_runs + self.yolo_skips
+        if total == 0:
+            return 0.0
+        return self.yolo_skips / total
\ No newline at end of file
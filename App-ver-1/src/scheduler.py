@@ -0,0 +1,54 @@
+import threading
+
+class FrameScheduler:
+    def __init__(self, max_fps=30, min_fps=2, backoff=1.5, idle_frames=3,
+                 error_delay=0.1, max_error_delay=2.0):
+        # Full rate is max_fps; idle frames back off exponentially down to min_fps
+        self.max_fps = max_fps
+        self.min_fps = min_fps
+        self.backoff = backoff
+        # Number of unchanged frames in a row before we start backing off
+        self.idle_frames = idle_frames
+        # Errors back off exponentially from error_delay up to max_error_delay
+        self.error_delay = error_delay
+        self.max_error_delay = max_error_delay
+
+        self.lock = threading.Lock()
+        self.interval = 1.0 / max_fps
+        self.idle_count = 0
+        self.error_count = 0
+
+    def set_limits(self, max_fps, min_fps):
+        # Called from the UI thread while the bot is running
+        with self.lock:
+            self.max_fps = max(1, max_fps)
+            self.min_fps = max(1, min(min_fps, self.max_fps))
+            self.interval = min(max(self.interval, 1.0 / self.max_fps), 1.0 / self.min_fps)
+
+    def frame_done(self, changed):
+        with self.lock:
+            self.error_count = 0
+            if changed:
+                # Something new on screen: snap back to full rate
+                self.idle_count = 0
+                self.interval = 1.0 / self.max_fps
+                return
+
+            self.idle_count += 1
+            if self.idle_count >= self.idle_frames:
+                self.interval = min(self.interval * self.backoff, 1.0 / self.min_fps)
+
+    def frame_failed(self):
+        with self.lock:
+            self.error_count += 1
+
+    def delay(self, elapsed):
+        # Seconds to sleep before the next frame, given how long this one took
+        with self.lock:
+            if self.error_count:
+                return min(self.error_delay * (2 ** (self.error_count - 1)), self.max_error_delay)
+            return max(0.0, self.interval - elapsed)
+
+    def current_fps(self):
+        with self.lock:
+            return 1.0 / self.interval
\ No newline at end of file
@@ -1,29 +1,102 @@
+import threading
+import cv2
 import numpy as np
 from mss import mss
+from .buffer_pool import BufferPool
 
 class ScreenCapture:
-    def __init__(self):
-        self.sct = mss()
+    def __init__(self, buffer_count=6):
+        # mss handles are not safe to share between threads, keep one per thread.
+        # A thread that grabs must call close_thread() before it exits: mss only
+        # releases its X display / GDI handles on an explicit close()
+        self.local = threading.local()
         
-        # By default, capture primary monitor
-        self.monitor = self.sct.monitors[1]  # monitors[0] is all monitors combined
+        # By default, capture primary monitor. Looked up with a short-lived handle, so
+        # the thread that builds the capture (e.g. the preload thread) keeps none open
+        with mss() as sct:
+            self.monitor = sct.monitors[1]  # monitors[0] is all monitors combined
         
         # Print monitor information
         print(f"Monitor dimensions: {self.monitor}")
-    
-    def capture(self):
-        # Capture screen
-        screenshot = np.array(self.sct.grab(self.monitor))
-        
-        # Get and print screenshot dimensions
-        height, width = screenshot.shape[:2]
-        print(f"Screenshot dimensions: {width}x{height} pixels")
+        self.last_size = None
         
-        # Convert BGRA to BGR (remove alpha channel)
-        if screenshot.shape[2] == 4:
-            screenshot = screenshot[:, :, :3]
+        # Frames are converted into a small ring of preallocated buffers instead of new
+        # arrays. A buffer is written again buffer_count grabs later, so this must stay
+        # larger than the number of frames the pipeline can hold at once.
+        self.buffer_count = buffer_count
+        # Rings are per thread, like the mss handle
+        self.buffer_pool = BufferPool()
+    
+    @property
+    def sct(self):
+        if not hasattr(self.local, 'sct'):
+            self.local.sct = mss()
+        return self.local.sct
+    
+    def close_thread(self):
+        # Close the calling thread's mss handle; a later grab on it opens a new one
+        sct = getattr(self.local, 'sct', None)
+        if sct is not None:
+            sct.close()
+            del self.local.sct
+    
+    def grab_bgra(self, region):
+        # Wrap the raw BGRA pixels of the grab without copying them
+        shot = self.sct.grab(region)
+        return np.frombuffer(shot.raw, dtype=np.uint8).reshape(shot.height, shot.width, 4)
+    
+    def capture_frame(self, box=None, color=True, gray=True):
+        # Grab the monitor, or a monitor-relative (x1, y1, x2, y2) box, and convert it once
+        # into reused buffers. Returns (bgr, gray); outputs not requested are None.
+        if box is None:
+            bgra = self.grab_bgra(self.monitor)
             
-        return screenshot
+            # Print dimensions only when they change, not on every frame
+            height, width = bgra.shape[:2]
+            if (width, height) != self.last_size:
+                self.last_size = (width, height)
+                print(f"Screenshot dimensions: {width}x{height} pixels")
+        else:
+            x1, y1, x2, y2 = box
+            # Region coordinates are relative to the monitor, mss expects absolute ones
+            bgra = self.grab_bgra({
+                'left': self.monitor['left'] + x1,
+                'top': self.monitor['top'] + y1,
+                'width': x2 - x1,
+                'height': y2 - y1,
+            })
+        
+        height, width = bgra.shape[:2]
+        bgr = None
+        if color:
+            # Contiguous BGR (alpha removed) for the detector
+            bgr = cv2.cvtColor(bgra, cv2.COLOR_BGRA2BGR, dst=self.buffer_pool.next('bgr', (height, width, 3), self.buffer_count))
+        gray_frame = None
+        if gray:
+            # Grayscale computed once per frame for tracking, hashing and thresholding
+            gray_frame = cv2.cvtColor(bgra, cv2.COLOR_BGRA2GRAY, dst=self.buffer_pool.next('gray', (height, width), self.buffer_count))
+        return bgr, gray_frame
+    
+    def capture(self):
+        # Capture screen as BGR
+        return self.capture_frame(gray=False)[0]
+    
+    def clamp_region(self, box, margin=0):
+        x1, y1, x2, y2 = box
+        x1 = max(0, x1 - margin)
+        y1 = max(0, y1 - margin)
+        x2 = min(self.monitor['width'], x2 + margin)
+        y2 = min(self.monitor['height'], y2 + margin)
+        return x1, y1, x2, y2
+    
+    def union_box(self, regions, margin=0):
+        # Bounding union of the given (x1, y1, x2, y2) regions, clamped to the monitor
+        boxes = [self.clamp_region(box, margin) for box in regions]
+        boxes = [b for b in boxes if b[2] > b[0] and b[3] > b[1]]
+        if not boxes:
+            return None
+        return (min(b[0] for b in boxes), min(b[1] for b in boxes),
+                max(b[2] for b in boxes), max(b[3] for b in boxes))
 
 # # Test the screen capture
 # if __name__ == "__main__":
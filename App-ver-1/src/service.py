@@ -0,0 +1,293 @@
+import json
+import socket
+import socketserver
+import struct
+import threading
+import time
+from collections import deque
+import cv2
+import numpy as np
+from .buffer_pool import BufferPool
+from .detector import detect_batch
+from .metrics import Metrics
+from .roi_tracker import RoiTracker
+from .symbol_processor import SymbolProcessor
+
+# Every message: 4-byte big-endian length, JSON header, then header['size'] payload bytes.
+#   {"op": "solve", "format": "image", "size": n}               + PNG/JPEG bytes
+#   {"op": "solve", "format": "raw", "shape": [h, w, c], "size": n} + uint8 pixels (BGR/BGRA/gray)
+#   {"op": "stats"}
+# Replies are a JSON header only: {"ok": true, ...} or {"ok": false, "error": "..."}
+LENGTH = struct.Struct('>I')
+
+def send_message(sock, header, payload=b''):
+    data = json.dumps(header).encode()
+    sock.sendall(LENGTH.pack(len(data)) + data)
+    if payload:
+        sock.sendall(payload)
+
+def recv_exact(sock, size):
+    buffer = bytearray(size)
+    view = memoryview(buffer)
+    received = 0
+    while received < size:
+        count = sock.recv_into(view[received:], size - received)
+        if count == 0:
+            raise ConnectionError("Connection closed")
+        received += count
+    return buffer
+
+def recv_message(sock):
+    (length,) = LENGTH.unpack(recv_exact(sock, LENGTH.size))
+    header = json.loads(recv_exact(sock, length))
+    size = header.get('size', 0)
+    return header, recv_exact(sock, size) if size else b''
+
+def decode_frame(header, payload):
+    # Returns (bgr, gray); raw frames are wrapped without copying
+    if header.get('format', 'image') == 'raw':
+        frame = np.frombuffer(payload, dtype=np.uint8).reshape(header['shape'])
+    else:
+        frame = cv2.imdecode(np.frombuffer(payload, dtype=np.uint8), cv2.IMREAD_COLOR)
+        if frame is None:
+            raise ValueError("Could not decode image")
+
+    if frame.ndim == 2:
+        return cv2.cvtColor(frame, cv2.COLOR_GRAY2BGR), frame
+    if frame.shape[2] == 4:
+        return cv2.cvtColor(frame, cv2.COLOR_BGRA2BGR), cv2.cvtColor(frame, cv2.COLOR_BGRA2GRAY)
+    return frame, cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+
+class ServiceMetrics(Metrics):
+    STAGES = ('queue', 'detect', 'solve', 'total')
+    COUNTERS = ('requests', 'answers', 'no_roi', 'errors', 'batches', 'detector_frames', 'roi_reused')
+
+class ClientSession:
+    def __init__(self, roi_tracker):
+        # Per-connection state. Each client's layout is tracked on its own, so its frames
+        # are only ever checked against the region signature of its own last detection.
+        self.roi_tracker = roi_tracker
+        self.frame_size = None
+
+class SolverService:
+    def __init__(self, detector, max_batch=8, batch_window=0.005):
+        # One warm detector shared by all clients. Concurrent requests are collected for up
+        # to batch_window seconds (or max_batch frames) and detected in one call.
+        self.detector = detector
+        self.symbol_processor = SymbolProcessor()
+        self.max_batch = max_batch
+        self.batch_window = batch_window
+
+        # Same shortcut as Bot.detect_roi: skip the detector while the layout hasn't moved.
+        # One tracker per client session; they all run on the batcher thread, so their
+        # scratch buffers come from one pool
+        self.tracker_pool = BufferPool()
+
+        self.jobs = deque()
+        self.condition = threading.Condition()
+        self.max_depth = 0
+        self.batch_sizes = deque(maxlen=1000)
+        self.metrics = ServiceMetrics()
+
+        self.running = True
+        self.thread = threading.Thread(target=self.batch_loop, name="batcher", daemon=True)
+        self.thread.start()
+
+    def open_session(self):
+        # One per client connection; pass it to handle() with every request of that client
+        return ClientSession(RoiTracker(pool=self.tracker_pool))
+
+    def detect(self, frame, gray, session=None):
+        # Called from a client thread; blocks until the batcher has handled the frame.
+        # Without a session the frame is always sent to the detector.
+        job = {'frame': frame, 'gray': gray, 'session': session, 'roi': None, 'error': None,
+               'event': threading.Event(), 'queued_at': time.perf_counter()}
+        with self.condition:
+            self.jobs.append(job)
+            self.max_depth = max(self.max_depth, len(self.jobs))
+            self.condition.notify()
+        job['event'].wait()
+        if job['error'] is not None:
+            raise RuntimeError(job['error'])
+        return job['roi']
+
+    def next_batch(self):
+        with self.condition:
+            while self.running and not self.jobs:
+                self.condition.wait(0.1)
+            if not self.jobs:
+                return []
+            # Give concurrent clients a moment to join this batch
+            deadline = time.perf_counter() + self.batch_window
+            while len(self.jobs) < self.max_batch:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                self.condition.wait(remaining)
+            return [self.jobs.popleft() for _ in range(min(self.max_batch, len(self.jobs)))]
+
+    def batch_loop(self):
+        while self.running:
+            batch = self.next_batch()
+            if batch:
+                self.detect_jobs(batch)
+
+    def detect_jobs(self, batch):
+        now = time.perf_counter()
+        pending = []
+        for job in batch:
+            self.metrics.record('queue', now - job['queued_at'])
+            session = job['session']
+            if session is None:
+                pending.append(job)
+                continue
+
+            # Check if this client's screen dimensions have changed
+            size = job['gray'].shape[:2]
+            if size != session.frame_size:
+                session.frame_size = size
+                session.roi_tracker.reset()
+
+            roi = session.roi_tracker.lookup(job['gray'])
+            if roi is not None:
+                job['roi'] = roi
+                self.metrics.count('roi_reused')
+            else:
+                pending.append(job)
+
+        if pending:
+            try:
+                with self.metrics.time('detect'):
+                    rois = detect_batch(self.detector, [job['frame'] for job in pending])
+                for job, roi in zip(pending, rois):
+                    job['roi'] = roi
+                    # Every detected frame updates its own client's tracker
+                    if job['session'] is not None:
+                        job['session'].roi_tracker.update(job['gray'], roi)
+            except Exception as e:
+                for job in pending:
+                    job['error'] = f"Detection failed: {str(e)}"
+            self.metrics.count('detector_frames', len(pending))
+
+        self.metrics.count('batches')
+        self.batch_sizes.append(len(batch))
+        for job in batch:
+            job['event'].set()
+
+    def solve(self, header, payload, session=None):
+        start = time.perf_counter()
+        self.metrics.count('requests')
+        frame, gray = decode_frame(header, payload)
+        roi = self.detect(frame, gray, session)
+        roi = {key: [int(v) for v in box] for key, box in roi.items()}
+
+        reply = {'ok': True, 'roi': roi, 'answer': None, 'losses': None, 'margin': None}
+        if 'reference' not in roi or 'question' not in roi:
+            self.metrics.count('no_roi')
+        else:
+            # Extraction and matching run on the client's thread, outside the batcher
+            with self.metrics.time('solve'):
+                x1, y1, x2, y2 = roi['reference']
+                ref_symbols = self.symbol_processor.extract_reference_symbols(gray[y1:y2, x1:x2])
+                x1, y1, x2, y2 = roi['question']
+                question_symbols = self.symbol_processor.extract_question_symbols(gray[y1:y2, x1:x2])
+                result = self.symbol_processor.solve_missing_symbol(ref_symbols, question_symbols)
+            reply['answer'] = result['answer']
+            reply['margin'] = float(result['margin'])
+            if result['losses'] is not None:
+                reply['losses'] = [[round(float(v), 5) for v in row] for row in result['losses']]
+            if result['answer'] is not None:
+                self.metrics.count('answers')
+
+        elapsed = time.perf_counter() - start
+        self.metrics.record('total', elapsed)
+        reply['latency_ms'] = elapsed * 1000
+        return reply
+
+    def stats(self):
+        with self.condition:
+            depth = len(self.jobs)
+            max_depth = self.max_depth
+        sizes = list(self.batch_sizes)
+        return {
+            'ok': True,
+            'queue_depth': depth,
+            'max_queue_depth': max_depth,
+            'avg_batch_size': sum(sizes) / len(sizes) if sizes else 0.0,
+            'metrics': self.metrics.snapshot(),
+        }
+
+    def handle(self, header, payload, session=None):
+        op = header.get('op')
+        if op == 'solve':
+            return self.solve(header, payload, session)
+        if op == 'stats':
+            return self.stats()
+        raise ValueError(f"Unknown op: {op}")
+
+    def close(self):
+        self.running = False
+        self.thread.join()
+
+class RequestHandler(socketserver.BaseRequestHandler):
+    def handle(self):
+        # One connection can send any number of requests, answered in order
+        service = self.server.service
+        session = service.open_session()
+        while True:
+            try:
+                header, payload = recv_message(self.request)
+            except (ConnectionError, OSError):
+                return
+            try:
+                reply = service.handle(header, payload, session)
+            except Exception as e:
+                service.metrics.count('errors')
+                reply = {'ok': False, 'error': str(e)}
+            try:
+                send_message(self.request, reply)
+            except OSError:
+                return
+
+class TcpServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+def create_server(service, host='127.0.0.1', port=8765, unix_path=None):
+    # Unix socket when a path is given (and supported), otherwise localhost TCP
+    if unix_path:
+        server = socketserver.ThreadingUnixStreamServer(unix_path, RequestHandler)
+        server.daemon_threads = True
+    else:
+        server = TcpServer((host, port), RequestHandler)
+    server.service = service
+    return server
+
+class SolverClient:
+    def __init__(self, address=('127.0.0.1', 8765)):
+        # address: (host, port) for TCP or a path for a Unix socket
+        if isinstance(address, str):
+            self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        else:
+            self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.sock.connect(address)
+
+    def request(self, header, payload=b''):
+        send_message(self.sock, header, payload)
+        reply, _ = recv_message(self.sock)
+        return reply
+
+    def solve_frame(self, frame):
+        frame = np.ascontiguousarray(frame, dtype=np.uint8)
+        return self.request({'op': 'solve', 'format': 'raw', 'shape': list(frame.shape),
+                             'size': frame.nbytes}, memoryview(frame).cast('B'))
+
+    def solve_image(self, data):
+        return self.request({'op': 'solve', 'format': 'image', 'size': len(data)}, data)
+
+    def stats(self):
+        return self.request({'op': 'stats'})
+
+    def close(self):
+        self.sock.close()
\ No newline at end of file
@@ -0,0 +1,65 @@
+import cv2
+import numpy as np
+
+# Ukuran standar untuk perbandingan simbol
+NORMALIZED_SIZE = (64, 64)
+
+class Symbol:
+    # Compact symbol: the matcher only needs image, contour and the normalized image,
+    # everything else is computed on first access and cached
+    __slots__ = ('image', 'contour', 'position', 'normalized',
+                 '_shape_moments', '_hu_moments', '_h_proj', '_v_proj', '_area')
+
+    def __init__(self, image, contour, position):
+        self.image = image
+        self.contour = contour
+        self.position = position
+
+        # Resized once here instead of on every comparison
+        self.normalized = cv2.resize(image, NORMALIZED_SIZE)
+
+        self._shape_moments = None
+        self._hu_moments = None
+        self._h_proj = None
+        self._v_proj = None
+        self._area = None
+
+    @property
+    def shape_moments(self):
+        # Raw Hu moments of the contour, as used by cv2.matchShapes
+        if self._shape_moments is None:
+            self._shape_moments = cv2.HuMoments(cv2.moments(self.contour)).flatten()
+        return self._shape_moments
+
+    @property
+    def hu_moments(self):
+        # Log transform for better numerical stability
+        if self._hu_moments is None:
+            hu = self.shape_moments
+            self._hu_moments = -np.sign(hu) * np.log10(np.abs(hu) + 1e-10)
+        return self._hu_moments
+
+    @property
+    def h_proj(self):
+        # Horizontal projection
+        if self._h_proj is None:
+            self._h_proj = np.sum(self.image, axis=1) / 255
+        return self._h_proj
+
+    @property
+    def v_proj(self):
+        # Vertical projection
+        if self._v_proj is None:
+            self._v_proj = np.sum(self.image, axis=0) / 255
+        return self._v_proj
+
+    @property
+    def aspect_ratio(self):
+        _, _, w, h = self.position
+        return float(w) / h
+
+    @property
+    def area(self):
+        if self._area is None:
+            self._area = cv2.contourArea(self.contour)
+        return self._area
\ No newline at end of file
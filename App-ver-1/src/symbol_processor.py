@@ -1,151 +1,108 @@
 import cv2
 import numpy as np
+from .debug_sink import DebugSink
+from .symbol import Symbol
+from .components import ComponentLabels
+from .buffer_pool import BufferPool
 
 class SymbolProcessor:
-    def __init__(self):
+    def __init__(self, debug_sink=None):
         # Ubah threshold untuk perbandingan simbol
         self.similarity_threshold = 1.0
-    
-    def extract_reference_symbols(self, reference_image):
-        # Simpan gambar untuk debugging
-        cv2.imwrite("debug_images/debug_reference_area.png", reference_image)
         
+        # Debug images go through the sink (disabled unless configured)
+        self.debug_sink = debug_sink if debug_sink is not None else DebugSink()
+        
+        # Binary and label images are reused between calls (one set per thread).
+        # Anything kept after a call (symbol images) is copied out of them.
+        self.buffer_pool = BufferPool()
+    
+    def binarize(self, image):
         # Convert to grayscale
-        gray = cv2.cvtColor(reference_image, cv2.COLOR_BGR2GRAY)
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if len(image.shape) == 3 else image
         
         # Apply threshold to get binary image
-        _, binary = cv2.threshold(gray, 150, 255, cv2.THRESH_BINARY_INV)
+        binary = self.buffer_pool.get('binary', gray.shape)
+        cv2.threshold(gray, 150, 255, cv2.THRESH_BINARY_INV, dst=binary)
         
         # Periksa polaritas dan samakan (latar belakang hitam, simbol putih)
-        white_pixel_percentage = np.sum(binary) / (binary.shape[0] * binary.shape[1] * 255)
+        white_pixel_percentage = cv2.countNonZero(binary) / binary.size
         if white_pixel_percentage > 0.5:
-            binary = 255 - binary
+            cv2.bitwise_not(binary, dst=binary)
         
-        # Find contours
-        contours, _ = cv2.findContours(binary, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        return binary
+    
+    def label_components(self, binary):
+        return ComponentLabels(binary, labels=self.buffer_pool.get('labels', binary.shape, np.int32))
+    
+    def extract_reference_symbols(self, reference_image):
+        # Simpan gambar untuk debugging
+        self.debug_sink.save("debug_reference_area", reference_image)
         
-        # Filter small contours (noise)
-        contours = [c for c in contours if 50 < cv2.contourArea(c) < 5000]  # Batasi ukuran maksimum
+        binary = self.binarize(reference_image)
+        components = self.label_components(binary)
         
-        # TAMBAHKAN URUTAN EKSPLISIT BERDASARKAN POSISI X
-        # Ini memastikan urutan dari kiri ke kanan (A, B, C, D, E)
-        sorted_positions = []
-        for contour in contours:
-            x, y, w, h = cv2.boundingRect(contour)
-            sorted_positions.append((x, contour))
+        # Top-level components only (like RETR_EXTERNAL); the contour is traced only for
+        # components whose bounding box can hold more than the minimum area
+        candidates = []
+        for label in components.top_level():
+            x, y, w, h = components.box(label)
+            if w * h <= 50:
+                continue
+            contour = components.contour(label)
+            
+            # Filter small contours (noise)
+            if 50 < cv2.contourArea(contour) < 5000:  # Batasi ukuran maksimum
+                candidates.append((x, y, w, h, contour))
         
-        # Sort berdasarkan posisi X secara ketat
-        sorted_positions.sort(key=lambda item: item[0])
-        contours = [item[1] for item in sorted_positions]
+        # Sort berdasarkan posisi X secara ketat (A, B, C, D, E dari kiri ke kanan)
+        candidates.sort(key=lambda item: item[0])
         
         # Pastikan hanya 5 simbol referensi
-        if len(contours) > 5:
-            contours = contours[:5]  # Ambil 5 pertama
+        candidates = candidates[:5]
             
         # Extract each symbol
         symbols = []
-        for i, contour in enumerate(contours):
-            x, y, w, h = cv2.boundingRect(contour)
-            symbol_img = binary[y:y+h, x:x+w]
-            
-            # Calculate features
-            moments = cv2.moments(contour)
-            hu_moments = cv2.HuMoments(moments).flatten()
-            
-            # Log transform for better numerical stability
-            hu_moments = -np.sign(hu_moments) * np.log10(np.abs(hu_moments) + 1e-10)
-            
-            # Horizontal and vertical projections
-            h_proj = np.sum(symbol_img, axis=1) / 255
-            v_proj = np.sum(symbol_img, axis=0) / 255
+        for i, (x, y, w, h, contour) in enumerate(candidates):
+            # Copied: binary is a reused buffer
+            symbol_img = binary[y:y+h, x:x+w].copy()
             
-            symbols.append({
-                'image': symbol_img,
-                'contour': contour,
-                'position': (x, y, w, h),
-                'features': {
-                    'hu_moments': hu_moments,
-                    'h_proj': h_proj,
-                    'v_proj': v_proj,
-                    'aspect_ratio': float(w) / h,
-                    'area': cv2.contourArea(contour)
-                }
-            })
+            # Features are computed lazily by Symbol when needed
+            symbols.append(Symbol(symbol_img, contour, (x, y, w, h)))
             
             # Save symbol for debugging
-            cv2.imwrite(f"debug_images/debug_reference_symbol_{i}.png", symbol_img)
+            self.debug_sink.save(f"debug_reference_symbol_{i}", symbol_img)
             print(f"Ref symbol {i} position: {(x, y, w, h)}")
         
         return symbols
     
-    def extract_inner_symbol(self, box_img):
-        # Convert to grayscale
-        gray = cv2.cvtColor(box_img, cv2.COLOR_BGR2GRAY) if len(box_img.shape) == 3 else box_img
-        
-        # Apply threshold
-        _, binary = cv2.threshold(gray, 150, 255, cv2.THRESH_BINARY_INV)
-        
-        # Periksa polaritas dan samakan (latar belakang hitam, simbol putih)
-        white_pixel_percentage = np.sum(binary) / (binary.shape[0] * binary.shape[1] * 255)
-        if white_pixel_percentage > 0.5:
-            binary = 255 - binary
-        
-        # Find contours
-        contours, _ = cv2.findContours(binary, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-        
-        if not contours:
-            return binary
-        
-        # Get largest contour (likely the symbol)
-        largest_contour = max(contours, key=cv2.contourArea)
-        
-        # Create mask and extract symbol
-        mask = np.zeros_like(binary)
-        cv2.drawContours(mask, [largest_contour], 0, 255, -1)
-        
-        # Apply mask to get clean symbol
-        symbol = cv2.bitwise_and(binary, mask)
-        
-        return symbol
-    
     def extract_question_symbols(self, question_image):
         # Simpan gambar untuk debugging
-        cv2.imwrite("debug_images/debug_question_area.png", question_image)
-        
-        # Convert to grayscale
-        gray = cv2.cvtColor(question_image, cv2.COLOR_BGR2GRAY)
+        self.debug_sink.save("debug_question_area", question_image)
         
-        # Apply threshold to get binary image
-        _, binary = cv2.threshold(gray, 150, 255, cv2.THRESH_BINARY_INV)
-        
-        # Periksa polaritas dan samakan (latar belakang hitam, simbol putih)
-        white_pixel_percentage = np.sum(binary) / (binary.shape[0] * binary.shape[1] * 255)
-        if white_pixel_percentage > 0.5:
-            binary = 255 - binary
-        
-        # Find contours of boxes
-        contours, _ = cv2.findContours(binary, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        # One labeling pass finds both the boxes and the symbols inside them
+        binary = self.binarize(question_image)
+        components = self.label_components(binary)
         
         # Filter by size and shape (boxes should be rectangular)
-        box_contours = []
-        for contour in contours:
-            x, y, w, h = cv2.boundingRect(contour)
+        boxes = []
+        for label in components.top_level():
+            x, y, w, h = components.box(label)
             aspect_ratio = float(w) / h
             
             # Typical boxes have aspect ratio close to 1 (square)
-            if 0.5 < aspect_ratio < 1.5 and cv2.contourArea(contour) > 500:
-                box_contours.append((x, y, w, h, contour))
+            if 0.5 < aspect_ratio < 1.5 and w * h > 500:
+                if cv2.contourArea(components.contour(label)) > 500:
+                    boxes.append((x, y, w, h, label))
         
         # Sort boxes by x position (left to right)
-        box_contours = sorted(box_contours, key=lambda b: b[0])
+        boxes.sort(key=lambda b: b[0])
         
         # Extract symbols from inside boxes
         symbols = []
-        for i, box in enumerate(box_contours):
-            x, y, w, h = box[:4]
-            
+        padding = 5
+        for i, (x, y, w, h, box_label) in enumerate(boxes):
             # Extract the area inside the box with padding
-            padding = 5
             inner_x = x + padding
             inner_y = y + padding
             inner_w = w - 2 * padding
@@ -154,63 +111,49 @@ class SymbolProcessor:
             # Make sure we're within bounds
             if inner_w <= 0 or inner_h <= 0:
                 continue
-                
-            # Get the region of interest
-            inner_roi = binary[inner_y:inner_y+inner_h, inner_x:inner_x+inner_w]
             
-            # Extract clean symbol using new method
-            clean_symbol = self.extract_inner_symbol(inner_roi)
+            # Largest component inside the box that reaches into the inner area
+            inner = []
+            for label in components.children(box_label):
+                cx, cy, cw, ch = components.box(label)
+                if cx < inner_x + inner_w and cx + cw > inner_x and cy < inner_y + inner_h and cy + ch > inner_y:
+                    inner.append(label)
+            if not inner:
+                continue
+            symbol_label = max(inner, key=components.area)
             
-            # Find contours of the clean symbol
-            clean_contours, _ = cv2.findContours(clean_symbol, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+            # Clean symbol: the component plus anything nested in its holes
+            nested = components.descendants(symbol_label)
+            inner_labels = components.labels[inner_y:inner_y+inner_h, inner_x:inner_x+inner_w]
+            if nested:
+                clean_symbol = np.isin(inner_labels, [symbol_label] + nested).astype(np.uint8) * 255
+            else:
+                clean_symbol = cv2.compare(inner_labels, symbol_label, cv2.CMP_EQ)
             
-            if clean_contours:
-                # Get largest contour (the symbol)
-                inner_contour = max(clean_contours, key=cv2.contourArea)
-                
-                # Calculate features
-                moments = cv2.moments(inner_contour)
-                hu_moments = cv2.HuMoments(moments).flatten()
-                
-                # Log transform
-                hu_moments = -np.sign(hu_moments) * np.log10(np.abs(hu_moments) + 1e-10)
-                
-                # Horizontal and vertical projections
-                h_proj = np.sum(clean_symbol, axis=1) / 255
-                v_proj = np.sum(clean_symbol, axis=0) / 255
-                
-                # Add symbol to list
-                symbols.append({
-                    'image': clean_symbol,
-                    'contour': inner_contour,
-                    'position': (inner_x, inner_y, inner_w, inner_h),
-                    'features': {
-                        'hu_moments': hu_moments,
-                        'h_proj': h_proj,
-                        'v_proj': v_proj,
-                        'aspect_ratio': float(inner_w) / inner_h,
-                        'area': cv2.contourArea(inner_contour)
-                    }
-                })
-                
-                # Save for debugging
-                cv2.imwrite(f"debug_images/debug_question_symbol_{i}.png", clean_symbol)
+            # Contour of the kept component only, in inner-area coordinates
+            inner_contour = components.contour(symbol_label, origin=(inner_x, inner_y))
+            
+            # Add symbol to list
+            symbols.append(Symbol(clean_symbol, inner_contour, (inner_x, inner_y, inner_w, inner_h)))
+            
+            # Save for debugging
+            self.debug_sink.save(f"debug_question_symbol_{i}", clean_symbol)
         
         return symbols
     
     # Tambahkan metode compare_symbols ini
     def compare_symbols(self, symbol1, symbol2):
-        # Resize ke ukuran standar untuk perbandingan
-        size = (64, 64)  # Ukuran yang lebih besar untuk detail lebih baik
-        img1 = cv2.resize(symbol1['image'], size)
-        img2 = cv2.resize(symbol2['image'], size)
+        # Gambar sudah di-resize ke ukuran standar (64x64) oleh Symbol
+        img1 = symbol1.normalized
+        img2 = symbol2.normalized
+        size = img1.shape
         
         # Perbandingan berbasis pixel (lebih detail)
         pixel_diff = np.sum(np.abs(img1 - img2)) / (size[0]*size[1]*255)
         
         # Contour matching
         try:
-            contour_diff = cv2.matchShapes(symbol1['contour'], symbol2['contour'], cv2.CONTOURS_MATCH_I2, 0.0)
+            contour_diff = cv2.matchShapes(symbol1.contour, symbol2.contour, cv2.CONTOURS_MATCH_I2, 0.0)
         except:
             contour_diff = 1.0  # Default high value if matching fails
         
@@ -222,10 +165,67 @@ class SymbolProcessor:
         similarity = (0.5 * pixel_diff) + (0.3 * contour_diff) + (0.2 * template_score)
         
         return similarity    
+    
+    def stack_symbols(self, symbols, name='stack'):
+        # Stack the normalized images (N, 64, 64) and Hu moments (N, 7) of every symbol
+        images = self.buffer_pool.get(name, (len(symbols),) + symbols[0].normalized.shape)
+        np.stack([symbol.normalized for symbol in symbols], out=images)
+        hu = np.zeros((len(symbols), 7))
+        valid = np.ones(len(symbols), dtype=bool)
+        
+        for i, symbol in enumerate(symbols):
+            try:
+                hu[i] = symbol.shape_moments
+            except:
+                valid[i] = False
+        
+        return images, hu, valid
+    
+    def compute_loss_matrix(self, question_symbols, ref_symbols):
+        # Same loss as compare_symbols, for every (question, reference) pair at once.
+        # Returns an array of shape (len(question_symbols), len(ref_symbols)).
+        q_images, q_hu, q_valid = self.stack_symbols(question_symbols, 'question_stack')
+        r_images, r_hu, r_valid = self.stack_symbols(ref_symbols, 'reference_stack')
+        pixels = q_images.shape[1] * q_images.shape[2]
+        
+        # Pixel diff; uint8 subtraction wraps exactly like compare_symbols does
+        diff = np.subtract(q_images[:, None], r_images[None, :],
+                           out=self.buffer_pool.get('pixel_diff', (len(q_images), len(r_images)) + q_images.shape[1:]))
+        pixel_diff = diff.reshape(len(q_images), len(r_images), -1).sum(axis=2) / (pixels * 255)
+        
+        # matchShapes(CONTOURS_MATCH_I2) on precomputed Hu moments
+        eps = 1e-5
+        q_log = np.sign(q_hu) * np.log10(np.maximum(np.abs(q_hu), eps))
+        r_log = np.sign(r_hu) * np.log10(np.maximum(np.abs(r_hu), eps))
+        used = (np.abs(q_hu)[:, None] > eps) & (np.abs(r_hu)[None, :] > eps)
+        contour_diff = np.where(used, np.abs(q_log[:, None] - r_log[None, :]), 0.0).sum(axis=2)
+        contour_diff[~q_valid, :] = 1.0
+        contour_diff[:, ~r_valid] = 1.0
+        
+        # TM_CCOEFF_NORMED of two equally sized images is their correlation coefficient
+        q_flat = self.buffer_pool.get('question_flat', (len(q_images), pixels), np.float64)
+        r_flat = self.buffer_pool.get('reference_flat', (len(r_images), pixels), np.float64)
+        np.copyto(q_flat, q_images.reshape(len(q_images), -1))
+        np.copyto(r_flat, r_images.reshape(len(r_images), -1))
+        q_flat -= q_flat.mean(axis=1, keepdims=True)
+        r_flat -= r_flat.mean(axis=1, keepdims=True)
+        norms = np.outer(np.linalg.norm(q_flat, axis=1), np.linalg.norm(r_flat, axis=1))
+        numerator = q_flat @ r_flat.T
+        correlation = np.divide(numerator, norms, out=np.zeros_like(numerator), where=norms > 0)
+        template_score = 1.0 - np.clip(correlation, -1.0, 1.0)
+        
+        # Kombinasikan dengan bobot yang disesuaikan
+        return (0.5 * pixel_diff) + (0.3 * contour_diff) + (0.2 * template_score)
 
     def find_missing_symbol(self, ref_symbols, question_symbols):
+        return self.solve_missing_symbol(ref_symbols, question_symbols)['answer']
+    
+    def solve_missing_symbol(self, ref_symbols, question_symbols):
+        # Like find_missing_symbol, but also returns the loss matrix and a confidence
+        # margin (how far the decisions were from flipping)
+        result = {'answer': None, 'losses': None, 'margin': 0.0}
         if not ref_symbols or not question_symbols:
-            return None
+            return result
         
         # Match question symbols to reference symbols
         matched_indices = set()
@@ -234,31 +234,27 @@ class SymbolProcessor:
         print(f"Question symbols: {len(question_symbols)}")
         
         # Buat matriks loss untuk semua kombinasi simbol pertanyaan dan referensi
-        loss_matrix = {}
-        for i, q_sym in enumerate(question_symbols):
-            for j, r_sym in enumerate(ref_symbols):
-                loss = self.compare_symbols(q_sym, r_sym)
-                if j not in loss_matrix:
-                    loss_matrix[j] = []
-                loss_matrix[j].append(loss)
+        losses = self.compute_loss_matrix(question_symbols, ref_symbols)
+        loss_matrix = {j: list(losses[:, j]) for j in range(len(ref_symbols))}
+        result['losses'] = losses
+        
+        # Margin: gap between the best and second best reference of every question symbol
+        if losses.shape[1] > 1:
+            sorted_losses = np.sort(losses, axis=1)
+            result['margin'] = float(np.min(sorted_losses[:, 1] - sorted_losses[:, 0]))
         
         # Untuk setiap simbol pertanyaan, temukan kecocokan terbaik
-        for i, q_sym in enumerate(question_symbols):
-            best_match_idx = -1
-            best_match_loss = float('inf')
-            
-            for j, r_sym in enumerate(ref_symbols):
-                loss = self.compare_symbols(q_sym, r_sym)
-                
-                if loss < best_match_loss:
-                    best_match_loss = loss
-                    best_match_idx = j
+        for i in range(len(question_symbols)):
+            best_match_idx = int(np.argmin(losses[i]))
+            best_match_loss = losses[i, best_match_idx]
             
             print(f"Question symbol {i} matched with reference {best_match_idx} (loss: {best_match_loss:.4f})")
             
             # Simbol hanya dianggap cocok jika loss-nya di bawah threshold
             if best_match_loss < self.similarity_threshold:
                 matched_indices.add(best_match_idx)
+            else:
+                self.debug_sink.flag_anomaly(f"no match for question symbol {i}")
         
         # Find the missing index (symbol not in question)
         all_indices = set(range(len(ref_symbols)))
@@ -271,6 +267,7 @@ class SymbolProcessor:
             # Jika ada lebih dari satu indeks yang hilang
             if len(missing_indices) > 1:
                 print(f"Multiple missing indices detected: {missing_indices}")
+                self.debug_sink.flag_anomaly("multiple missing indices")
                 
                 # Kita perlu menganalisis semua loss untuk tiap indeks yang hilang
                 min_loss_indices = {}
@@ -291,14 +288,20 @@ class SymbolProcessor:
                     missing_idx = list(missing_indices)[0]  # Mengambil indeks yang tersisa
                     
                     print(f"Index {best_match_idx} has best match with min loss: {min_loss_indices[best_match_idx]:.4f}")
+                    
+                    # The tie-break is only as confident as the gap between the two best candidates
+                    if len(min_loss_indices) > 1:
+                        gaps = sorted(min_loss_indices.values())
+                        result['margin'] = min(result['margin'], gaps[1] - gaps[0])
                     print(f"Selected missing index {missing_idx} as true missing symbol")
                 else:
                     # Fallback: ambil indeks pertama jika tidak ada data loss
                     missing_idx = list(missing_indices)[0]
+                    result['margin'] = 0.0
             else:
                 missing_idx = list(missing_indices)[0]
             
             # Convert to A, B, C, D, E
-            return chr(65 + missing_idx)
+            result['answer'] = chr(65 + missing_idx)
         
-        return None
\ No newline at end of file
+        return result
\ No newline at end of file
@@ -0,0 +1,62 @@
+import cv2
+import numpy as np
+
+# Glyphs that stay distinct after thresholding at every font and scale used below
+GLYPHS = "ACEFGHKLMNPRSTUVWXYZ2345"
+FONTS = (cv2.FONT_HERSHEY_SIMPLEX, cv2.FONT_HERSHEY_DUPLEX, cv2.FONT_HERSHEY_TRIPLEX)
+OPTIONS = "ABCDE"
+
+def draw_glyph(image, glyph, center, font, font_scale, thickness):
+    (width, height), _ = cv2.getTextSize(glyph, font, font_scale, thickness)
+    origin = (int(center[0] - width / 2), int(center[1] + height / 2))
+    cv2.putText(image, glyph, origin, font, font_scale, 0, thickness, cv2.LINE_AA)
+
+def finish(image, rng, noise, invert):
+    # Uniform pixel noise, optional polarity inversion, then BGR like a screen grab
+    if noise:
+        image = np.clip(image.astype(np.int16) + rng.integers(-noise, noise + 1, image.shape), 0, 255)
+        image = image.astype(np.uint8)
+    if invert:
+        image = 255 - image
+    return cv2.cvtColor(image, cv2.COLOR_GRAY2BGR)
+
+def make_panel(rng, scale=1.0, noise=0, invert=False, border=2, font=None, glyphs=GLYPHS):
+    """Random reference/question panel pair with a known missing option"""
+    font = FONTS[int(rng.integers(len(FONTS)))] if font is None else font
+    letters = [str(g) for g in rng.choice(list(glyphs), 5, replace=False)]
+    missing = int(rng.integers(5))
+    font_scale = 1.3 * scale
+    thickness = max(2, int(round(3 * scale)))
+
+    # Reference column: the five glyphs left to right (options A-E)
+    step = int(60 * scale)
+    reference = np.full((int(90 * scale), int(330 * scale)), 255, dtype=np.uint8)
+    for i, glyph in enumerate(letters):
+        draw_glyph(reference, glyph, (int(45 * scale) + i * step, int(45 * scale)),
+                   font, font_scale, thickness)
+
+    # Question: the other four glyphs in shuffled order, each inside a bordered box
+    order = [i for i in range(5) if i != missing]
+    rng.shuffle(order)
+    box, gap = int(70 * scale), int(20 * scale)
+    question = np.full((box + int(30 * scale), 4 * (box + gap) + gap), 255, dtype=np.uint8)
+    for slot, i in enumerate(order):
+        x, y = gap + slot * (box + gap), int(15 * scale)
+        cv2.rectangle(question, (x, y), (x + box, y + box), 0, border)
+        draw_glyph(question, letters[i], (x + box // 2, y + box // 2), font, font_scale, thickness)
+
+    return {
+        'reference': finish(reference, rng, noise, invert),
+        'question': finish(question, rng, noise, invert),
+        'answer': OPTIONS[missing],
+        'letters': letters,
+        # Reference index of each question box, left to right
+        'question_order': order,
+    }
+
+def make_panels(count, seed=0, scale=1.0, noise_levels=(0, 8), borders=(1, 2, 3)):
+    """Reproducible set of panels cycling through noise, border width and polarity"""
+    rng = np.random.default_rng(seed)
+    return [make_panel(rng, scale=scale, noise=noise_levels[i % len(noise_levels)],
+                       invert=(i // len(noise_levels)) % 2 == 1, border=borders[i % len(borders)])
+            for i in range(count)]
\ No newline at end of file
@@ -7,14 +7,6 @@ def preprocess_image(image):
     _, binary = cv2.threshold(gray, 150, 255, cv2.THRESH_BINARY_INV)
     return binary
 
-def calculate_image_hash(image):
-    """Calculate perceptual hash of an image"""
-    if len(image.shape) == 3:
-        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-    else:
-        gray = image
-    return cv2.img_hash.pHash(gray)[0]
-
 def compare_images(img1, img2):
     """Compare two images using pixel-wise difference"""
     # Resize to same dimensions
@@ -0,0 +1,12 @@
+import os
+import sys
+
+# Tests import the app modules as "src.*", the same way main.py does
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def pytest_addoption(parser):
+    parser.addoption("--update-baselines", action="store_true", default=False,
+                     help="Re-record tests/baselines/*.json from this run instead of checking against them")
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "benchmark: timing/accuracy benchmark checked against a JSON baseline")
\ No newline at end of file
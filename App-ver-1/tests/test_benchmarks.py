@@ -0,0 +1,117 @@
+import contextlib
+import gc
+import io
+import json
+import os
+import time
+import numpy as np
+import pytest
+from src.symbol_processor import SymbolProcessor
+from src.synthetic import make_panels
+
+# Timing and accuracy of the SymbolProcessor entry points per panel size, checked
+# against tests/baselines/symbol_processor.json. Timings are machine dependent; re-record
+# them on the machine the suite runs on: `python -m pytest tests --update-baselines`.
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baselines", "symbol_processor.json")
+SCALES = (0.75, 1.0, 1.5, 2.0)
+FUNCTIONS = ('extract_reference_symbols', 'extract_question_symbols', 'compare_symbols', 'find_missing_symbol')
+PANELS_PER_SCALE = 24
+# Timings are the median of REPEATS passes; a baseline is the median of RECORD_ROUNDS
+# such measurements, so neither a slow burst nor one lucky run sets the bar
+REPEATS = 7
+RECORD_ROUNDS = 3
+
+# A run fails if it is this much slower than the baseline (plus a small absolute
+# allowance for timer noise on sub-millisecond calls) or less accurate at all.
+# Idle runs of an unchanged tree differ by up to ~1.7x between processes on a shared
+# VM; 1.75x on the median never failed across 56 run pairs, 1.5x did.
+TIME_TOLERANCE = 1.75
+TIME_ALLOWANCE_MS = 0.05
+
+pytestmark = pytest.mark.benchmark
+
+def timed(func, calls):
+    # Median of REPEATS of the mean time per call, in ms; returns (ms, last results).
+    # The collector is off while timing, like timeit, so a collection doesn't land in one pass
+    passes = []
+    gc.collect()
+    gc.disable()
+    try:
+        for _ in range(REPEATS):
+            with contextlib.redirect_stdout(io.StringIO()):
+                start = time.perf_counter()
+                results = [func(*args) for args in calls]
+                passes.append((time.perf_counter() - start) * 1000 / max(1, len(calls)))
+    finally:
+        gc.enable()
+    return float(np.median(passes)), results
+
+def measure(scale):
+    processor = SymbolProcessor()
+    panels = make_panels(PANELS_PER_SCALE, seed=int(scale * 100), scale=scale)
+
+    ref_ms, refs = timed(processor.extract_reference_symbols, [(p['reference'],) for p in panels])
+    question_ms, questions = timed(processor.extract_question_symbols, [(p['question'],) for p in panels])
+    complete = [i for i in range(len(panels)) if len(refs[i]) == 5 and len(questions[i]) == 4]
+
+    # compare_symbols: every question symbol against every reference symbol
+    pairs = [(q, r) for i in complete for q in questions[i] for r in refs[i]]
+    compare_ms, losses = timed(processor.compare_symbols, pairs)
+    losses = iter(losses)
+    matched = total = 0
+    for i in complete:
+        for slot in range(4):
+            row = [next(losses) for _ in range(5)]
+            matched += int(np.argmin(row)) == panels[i]['question_order'][slot]
+            total += 1
+
+    find_ms, answers = timed(processor.find_missing_symbol, [(refs[i], questions[i]) for i in range(len(panels))])
+
+    return {
+        'extract_reference_symbols': {'ms': ref_ms, 'accuracy': sum(len(r) == 5 for r in refs) / len(panels)},
+        'extract_question_symbols': {'ms': question_ms, 'accuracy': sum(len(q) == 4 for q in questions) / len(panels)},
+        'compare_symbols': {'ms': compare_ms, 'accuracy': matched / total if total else 0.0},
+        'find_missing_symbol': {'ms': find_ms, 'accuracy': sum(a == p['answer'] for a, p in zip(answers, panels)) / len(panels)},
+    }
+
+@pytest.fixture(scope="module")
+def measurements():
+    return {}
+
+@pytest.fixture(scope="module")
+def baselines(request):
+    data = {}
+    if os.path.exists(BASELINE_PATH):
+        with open(BASELINE_PATH) as f:
+            data = json.load(f)
+    yield data
+    if request.config.getoption("--update-baselines"):
+        os.makedirs(os.path.dirname(BASELINE_PATH), exist_ok=True)
+        with open(BASELINE_PATH, 'w') as f:
+            json.dump(data, f, indent=2, sort_keys=True)
+
+@pytest.mark.parametrize("name", FUNCTIONS)
+@pytest.mark.parametrize("scale", SCALES)
+def test_benchmark(scale, name, measurements, baselines, request):
+    key = f"scale_{scale}"
+    updating = request.config.getoption("--update-baselines")
+    if key not in measurements:
+        rounds = [measure(scale) for _ in range(RECORD_ROUNDS if updating else 1)]
+        # Accuracy is deterministic; only the timings differ between rounds
+        measurements[key] = {n: {'ms': float(np.median([r[n]['ms'] for r in rounds])),
+                                 'accuracy': rounds[0][n]['accuracy']} for n in FUNCTIONS}
+    result = {k: round(v, 4) for k, v in measurements[key][name].items()}
+
+    if updating:
+        baselines.setdefault(key, {})[name] = result
+        return
+
+    baseline = baselines.get(key, {}).get(name)
+    if baseline is None:
+        pytest.skip(f"No baseline for {key}/{name}, record one with --update-baselines")
+
+    assert result['accuracy'] >= baseline['accuracy'], \
+        f"{name} at {key}: accuracy {result['accuracy']:.3f} < baseline {baseline['accuracy']:.3f}"
+    limit = baseline['ms'] * TIME_TOLERANCE + TIME_ALLOWANCE_MS
+    assert result['ms'] <= limit, \
+        f"{name} at {key}: {result['ms']:.3f} ms per call > {limit:.3f} ms (baseline {baseline['ms']:.3f} ms)"
\ No newline at end of file
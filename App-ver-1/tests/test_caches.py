@@ -0,0 +1,52 @@
+import json
+import numpy as np
+from src.answer_cache import AnswerCache
+from src.fingerprint import KEY_FORMAT
+from src.reference_cache import ReferenceCache
+from src.symbol import Symbol
+
+def make_symbol(value):
+    image = np.full((8, 8), value, dtype=np.uint8)
+    contour = np.array([[[0, 0]], [[7, 0]], [[7, 7]], [[0, 7]]], dtype=np.int32)
+    return Symbol(image, contour, (value, 0, 8, 8))
+
+def test_reference_cache_nearest_hit_and_eviction():
+    cache = ReferenceCache(capacity=2, max_distance=2)
+    cache.put(0b0000, [make_symbol(1)])
+    cache.put(0b1111 << 8, [make_symbol(2)])
+    assert cache.get(0b0011)[0].position[0] == 1
+    assert cache.get(0b0111) is None
+    # Least recently used entry goes first
+    cache.put(0b1 << 20, [make_symbol(3)])
+    assert cache.get(0b1111 << 8) is None
+    assert (cache.hits, cache.misses) == (1, 2)
+    assert cache.hit_rate() == 1 / 3
+
+def test_answer_cache_needs_both_keys_close():
+    cache = AnswerCache(max_distance=(2, 1))
+    assert not cache.put(1, 1, 'A', margin=0.0)
+    assert cache.put(0, 0, 'B', margin=0.5)
+    assert cache.get(0b11, 0b1) == 'B'
+    assert cache.get(0b111, 0) is None
+    assert cache.get(0, 0b11) is None
+    assert cache.hit_rate() == 1 / 3
+
+def test_caches_round_trip_and_reject_other_key_formats(tmp_path):
+    answers = AnswerCache(path=str(tmp_path / "answers.json"))
+    answers.put(1 << 200, 5, 'C', margin=0.5)
+    answers.save()
+    assert AnswerCache(path=answers.path).get(1 << 200, 5) == 'C'
+
+    references = ReferenceCache(path=str(tmp_path / "references.npz"))
+    references.put(1 << 200, [make_symbol(4)])
+    references.save()
+    loaded = ReferenceCache(path=references.path).get(1 << 200)
+    assert loaded[0].position == (4, 0, 8, 8)
+
+    with open(answers.path) as f:
+        data = json.load(f)
+    assert data['key_format'] == KEY_FORMAT
+    data['key_format'] = 'ink_hash'
+    with open(answers.path, 'w') as f:
+        json.dump(data, f)
+    assert not AnswerCache(path=answers.path).entries
\ No newline at end of file
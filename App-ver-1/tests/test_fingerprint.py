@@ -0,0 +1,50 @@
+import cv2
+import numpy as np
+import pytest
+from src.fingerprint import REGION_THRESHOLDS, ChangeDetector, dhash, hamming_distance, phash
+from src.synthetic import FONTS, GLYPHS, draw_glyph, make_panel
+
+def replace_first_glyph(question, letters):
+    # Same question with the glyph in the first box swapped for an unused one
+    gray = question[:, :, 0].copy()
+    cv2.rectangle(gray, (25, 20), (85, 80), 255, -1)
+    glyph = next(g for g in GLYPHS if g not in letters)
+    draw_glyph(gray, glyph, (55, 50), FONTS[0], 1.3, 3)
+    return gray
+
+def test_hash_sizes():
+    image = make_panel(np.random.default_rng(1))['reference']
+    assert phash(image).bit_length() <= 64
+    assert phash(image, hash_size=16).bit_length() <= 256
+    assert dhash(image).bit_length() <= 64
+
+def test_hamming_distance():
+    assert hamming_distance(0, 0) == 0
+    assert hamming_distance(0b1011, 0b0001) == 2
+    assert hamming_distance(1 << 200, 0) == 1
+
+def test_gray_and_bgr_hash_the_same():
+    image = make_panel(np.random.default_rng(2))['question']
+    assert phash(image, 16) == phash(image[:, :, 0], 16)
+
+@pytest.mark.parametrize("seed", range(6))
+def test_question_change_detection(seed):
+    panel = make_panel(np.random.default_rng(seed), font=FONTS[0])
+    detector = ChangeDetector('question')
+    assert detector.check(panel['question'])
+    detector.accept()
+
+    # The same frame again is unchanged, a single replaced glyph is a change
+    assert not detector.check(panel['question'].copy())
+    assert detector.distance == 0
+    assert detector.check(replace_first_glyph(panel['question'], panel['letters']))
+    assert detector.distance > REGION_THRESHOLDS['question']
+
+def test_column_change_detection():
+    rng = np.random.default_rng(9)
+    detector = ChangeDetector('column')
+    detector.check(make_panel(rng)['reference'])
+    detector.accept()
+    assert detector.check(make_panel(rng)['reference'])
+    detector.reset()
+    assert detector.check(make_panel(rng)['reference']) and detector.distance is None
\ No newline at end of file
@@ -0,0 +1,60 @@
+import contextlib
+import io
+import numpy as np
+import pytest
+from src.symbol_processor import SymbolProcessor
+from src.synthetic import OPTIONS, make_panel, make_panels
+
+def quiet(func, *args):
+    # SymbolProcessor prints every match; keep test output readable
+    with contextlib.redirect_stdout(io.StringIO()):
+        return func(*args)
+
+@pytest.fixture
+def processor():
+    return SymbolProcessor()
+
+def test_panel_answer_is_the_missing_letter():
+    panel = make_panel(np.random.default_rng(3))
+    missing = OPTIONS.index(panel['answer'])
+    assert sorted(panel['question_order']) == [i for i in range(5) if i != missing]
+    assert panel['reference'].shape[2] == 3 and panel['question'].shape[2] == 3
+
+def test_panels_are_reproducible():
+    first, second = make_panels(4, seed=11), make_panels(4, seed=11)
+    for a, b in zip(first, second):
+        assert a['answer'] == b['answer']
+        assert np.array_equal(a['question'], b['question'])
+
+@pytest.mark.parametrize("invert", [False, True])
+@pytest.mark.parametrize("noise", [0, 8])
+def test_extraction_counts(processor, invert, noise):
+    panel = make_panel(np.random.default_rng(5), noise=noise, invert=invert)
+    assert len(quiet(processor.extract_reference_symbols, panel['reference'])) == 5
+    assert len(quiet(processor.extract_question_symbols, panel['question'])) == 4
+
+def test_gray_input_matches_bgr(processor):
+    panel = make_panel(np.random.default_rng(6))
+    from_bgr = quiet(processor.extract_question_symbols, panel['question'])
+    from_gray = quiet(processor.extract_question_symbols, panel['question'][:, :, 0])
+    assert [s.position for s in from_bgr] == [s.position for s in from_gray]
+    assert all(np.array_equal(a.image, b.image) for a, b in zip(from_bgr, from_gray))
+
+def test_loss_matrix_matches_compare_symbols(processor):
+    panel = make_panel(np.random.default_rng(7), noise=8)
+    refs = quiet(processor.extract_reference_symbols, panel['reference'])
+    questions = quiet(processor.extract_question_symbols, panel['question'])
+    losses = processor.compute_loss_matrix(questions, refs)
+    expected = [[processor.compare_symbols(q, r) for r in refs] for q in questions]
+    assert np.allclose(losses, expected, atol=1e-5)
+
+def test_polarity_does_not_change_the_answer(processor):
+    for seed in range(5):
+        normal = make_panel(np.random.default_rng(seed))
+        inverted = make_panel(np.random.default_rng(seed), invert=True)
+        answers = []
+        for panel in (normal, inverted):
+            refs = quiet(processor.extract_reference_symbols, panel['reference'])
+            questions = quiet(processor.extract_question_symbols, panel['question'])
+            answers.append(quiet(processor.find_missing_symbol, refs, questions))
+        assert answers[0] == answers[1]
\ No newline at end of file